@@ -0,0 +1,196 @@
+# Throughput benchmarks for korean_romanization.py
+#
+# Every corpus is generated locally from a fixed seed, so reports taken on different revisions
+# of the module are directly comparable:
+#
+#   $ python benchmarks/bench_romanization.py --output before.json
+#   $ python benchmarks/bench_romanization.py --output after.json --compare before.json
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from korean_romanization import HangulRomanizer
+
+
+# option combinations to benchmark (each one is passed to the HangulRomanizer constructor)
+CONFIGURATIONS = {
+    'default': {},
+    'uncached': {'cache_size': 0},
+    'show_h': {'show_h': 1, 'show_hada_h': False},
+    'stylistic': {'voiced_double': True, 'sh': False, 'oo': True, 'ee': True, 'no_y': True},
+    'always_tense': {'always_tense': True, 'na_neo_ye': True, 'ne_ni': False},
+}
+
+
+def random_syllable(rng):
+    return chr(HangulRomanizer.hangul_blocks + rng.randrange(HangulRomanizer.block_count))
+
+
+# words of 1-5 uniformly random Hangul blocks (worst case for caching)
+def random_syllable_corpus(rng, lines: int):
+    return [' '.join(''.join(random_syllable(rng) for _ in range(rng.randint(1, 5))) for _ in range(rng.randint(3, 12)))
+            for _ in range(lines)]
+
+
+# words drawn from a fixed vocabulary with Zipf-distributed frequencies, like lyrics and subtitles
+def zipf_corpus(rng, lines: int, vocabulary_size: int = 5000, exponent: float = 1.1):
+    vocabulary = [''.join(random_syllable(rng) for _ in range(rng.randint(1, 4))) for _ in range(vocabulary_size)]
+    weights = [1 / (rank ** exponent) for rank in range(1, vocabulary_size + 1)]
+    return [' '.join(rng.choices(vocabulary, weights, k=rng.randint(3, 12))) for _ in range(lines)]
+
+
+# a handful of very long lines
+def long_line_corpus(rng, lines: int):
+    words = max(lines // 4, 1) * 100
+    return [' '.join(''.join(random_syllable(rng) for _ in range(rng.randint(1, 4))) for _ in range(words))
+            for _ in range(4)]
+
+
+# Hangul phrases interleaved with English words, numbers, URLs, punctuation and emoji
+def mixed_corpus(rng, lines: int):
+    fillers = ['the', 'and', 'K-pop', '2024', 'https://example.com/a?b=1', '!!', '(ok)', '😀', 'v1.2.3', "'quote'"]
+    def word():
+        if rng.random() < 0.5:
+            return rng.choice(fillers)
+        hangul = ''.join(random_syllable(rng) for _ in range(rng.randint(1, 4)))
+        return hangul + rng.choice(['', '', '.', ',', '!', '?']) if rng.random() < 0.8 else rng.choice(fillers) + hangul
+    return [' '.join(word() for _ in range(rng.randint(3, 12))) for _ in range(lines)]
+
+
+CORPORA = {
+    'random_syllables': random_syllable_corpus,
+    'zipf': zipf_corpus,
+    'long_lines': long_line_corpus,
+    'mixed': mixed_corpus,
+}
+
+
+# best wall-clock time of fn() over repeat runs
+def best_time(fn, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# peak memory allocated by Python while running fn() once
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn, repeat: int, lines: int, words: int, size: int):
+    seconds = best_time(fn, repeat)
+    return {
+        'seconds': seconds,
+        'lines_per_sec': lines / seconds,
+        'words_per_sec': words / seconds,
+        'mb_per_sec': size / seconds / 1e6,
+        'peak_memory_bytes': peak_memory(fn),
+    }
+
+
+def run(lines: int, repeat: int, seed: int):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for corpus_name, generate in CORPORA.items():
+            corpus = generate(random.Random(seed), lines)
+            words = [word for line in corpus for word in line.split(' ')]
+            size = sum(len(line.encode('utf8')) + 1 for line in corpus)
+            hangul_in = os.path.join(directory, corpus_name + '.txt')
+            romanized_out = os.path.join(directory, corpus_name + '.out')
+            with open(hangul_in, 'w', encoding='utf8') as writer:
+                writer.writelines(line + '\n' for line in corpus)
+
+            for config_name, options in CONFIGURATIONS.items():
+                # build any lazily compiled tables before timing anything
+                HangulRomanizer(**options).romanize(corpus[0])
+
+                # a fresh romanizer for every operation, so caches never carry over between measurements
+                def romanize():
+                    hangul_romanizer = HangulRomanizer(**options)
+                    for line in corpus:
+                        hangul_romanizer.romanize(line)
+
+                def romanize_word():
+                    hangul_romanizer = HangulRomanizer(**options)
+                    for word in words:
+                        hangul_romanizer._romanize_word(word)
+
+                def romanize_file():
+                    HangulRomanizer(**options).romanize_file(hangul_in, romanized_out)
+
+                for operation, fn in (('romanize', romanize), ('_romanize_word', romanize_word), ('romanize_file', romanize_file)):
+                    result = measure(fn, repeat, len(corpus), len(words), size)
+                    result.update({'corpus': corpus_name, 'config': config_name, 'operation': operation})
+                    results.append(result)
+                    print(f"{corpus_name:<18}{config_name:<14}{operation:<16}"
+                          f"{result['words_per_sec']:>14,.0f} words/s{result['lines_per_sec']:>12,.0f} lines/s"
+                          f"{result['mb_per_sec']:>9.2f} MB/s{result['peak_memory_bytes'] / 1e6:>9.2f} MB peak", file=sys.stderr)
+    return results
+
+
+# print the speedup of every measurement relative to an earlier report
+def compare(results: list, baseline_path: str):
+    with open(baseline_path, 'r', encoding='utf8') as reader:
+        baseline = {(result['corpus'], result['config'], result['operation']): result for result in json.load(reader)['results']}
+    for result in results:
+        previous = baseline.get((result['corpus'], result['config'], result['operation']))
+        if previous is not None:
+            speedup = previous['seconds'] / result['seconds']
+            print(f"{result['corpus']:<18}{result['config']:<14}{result['operation']:<16}{speedup:>8.2f}x", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark HangulRomanizer throughput on generated corpora.')
+    parser.add_argument('--lines', type=int, default=2000, help='lines per generated corpus')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per measurement (the best is reported)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed used to generate the corpora')
+    parser.add_argument('--quick', action='store_true', help='small corpora and a single run, for smoke testing')
+    parser.add_argument('--output', help='write the JSON report here instead of to stdout')
+    parser.add_argument('--compare', help='JSON report from an earlier run to compare against')
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.lines, args.repeat = 200, 1
+
+    results = run(args.lines, args.repeat, args.seed)
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'lines': args.lines,
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as writer:
+            json.dump(report, writer, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
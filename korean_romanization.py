@@ -1,3 +1,617 @@
+import atexit
+import codecs
+import hashlib
+import io
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, deque
+from contextlib import nullcontext
+from functools import partial
+from itertools import islice
+
+
+# maximal runs of precomposed Hangul blocks (가-힣)
+_hangul_run = re.compile('[\uac00-\ud7a3]+')
+
+# anything but precomposed Hangul blocks and the ASCII space
+_not_hangul_or_space = re.compile('[^\uac00-\ud7a3 ]')
+
+# splits a string into words and the runs of Unicode whitespace between them (see HangulRomanizer._tokenize)
+_whitespace = re.compile(r'(\s+)')
+
+# the word at the start of a string (matched against a reversed block, it finds the word at the end of the block
+# in time proportional to that word's length, rather than backtracking from every position)
+_leading_word = re.compile(r'\S*')
+
+# in a reversed word, two adjacent non-Hangul characters the second of which (the first, unreversed) isn't a quotation
+# mark: a word can be cut between them without changing its romanization (see _romanize_blocks)
+_reversed_cut_point = re.compile('[^\uac00-\ud7a3\'"][^\uac00-\ud7a3]')
+
+
+# whether this interpreter has a global interpreter lock (free-threaded builds of Python 3.13+ can run without one)
+_gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+
+
+# bounded least-recently-used cache of romanized words
+# keys are (HangulRomanizer.fingerprint, word) pairs, so a single cache can safely be shared between
+# differently configured HangulRomanizer instances without results leaking between them
+# a cache can be shared by several threads: with the GIL, every OrderedDict operation is atomic, so lookups take no
+# lock (the statistics may then miss a few updates made by threads running at the same time); without it, each shard
+# has a lock, and by default larger caches are split into up to 16 shards by hash so that threads rarely wait for
+# each other
+# by default (and always with a single shard) the eviction order is exactly least-recently-used; with several shards,
+# each one evicts its own least recently used entries
+class RomanizationCache:
+
+    def __init__(self, maxsize: int = 4096, shards: int | None = None):
+        if shards is None:
+            shards = 1 if _gil_enabled else max(1, min(16, maxsize // 256))
+        elif shards < 1:
+            raise ValueError('shards must be positive')
+        shard_type = _CacheShard if _gil_enabled else _LockedCacheShard
+        self._shards = tuple(shard_type() for _ in range(shards))
+        self.resize(maxsize)
+        if shards == 1: # look up entries without dispatching on the hash
+            self.get = self._shards[0].get
+            self.put = self._shards[0].put
+
+    def __len__(self):
+        return sum(len(shard.entries) for shard in self._shards)
+
+    def get(self, key):
+        shards = self._shards
+        return shards[hash(key) % len(shards)].get(key)
+
+    def put(self, key, romanized: str):
+        shards = self._shards
+        shards[hash(key) % len(shards)].put(key, romanized)
+
+    # change the size bound, evicting the least recently used entries if necessary
+    def resize(self, maxsize: int):
+        if maxsize < 0:
+            raise ValueError('maxsize must be non-negative')
+        self.maxsize = maxsize
+        share, remainder = divmod(maxsize, len(self._shards))
+        for index, shard in enumerate(self._shards):
+            shard.resize(share + (index < remainder))
+
+    # drop all entries and reset the statistics
+    def clear(self):
+        for shard in self._shards:
+            shard.clear()
+
+    @property
+    def hits(self):
+        return sum(shard.hits for shard in self._shards)
+
+    @property
+    def misses(self):
+        return sum(shard.misses for shard in self._shards)
+
+    @property
+    def evictions(self):
+        return sum(shard.evictions for shard in self._shards)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self),
+            'maxsize': self.maxsize
+        }
+
+
+# one least-recently-used table of a RomanizationCache, for interpreters with the GIL
+# another thread may evict an entry between two operations here, which is harmless
+class _CacheShard:
+
+    __slots__ = ('entries', 'maxsize', 'hits', 'misses', 'evictions')
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.maxsize = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entries = self.entries
+        romanized = entries.get(key)
+        if romanized is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            try:
+                entries.move_to_end(key)
+            except KeyError:
+                pass
+        return romanized
+
+    def put(self, key, romanized: str):
+        if self.maxsize == 0:
+            return
+        entries = self.entries
+        entries[key] = romanized
+        try:
+            entries.move_to_end(key)
+        except KeyError:
+            pass
+        if len(entries) > self.maxsize:
+            self.evict()
+
+    def resize(self, maxsize: int):
+        self.maxsize = maxsize
+        self.evict()
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def evict(self):
+        entries = self.entries
+        while len(entries) > self.maxsize:
+            try:
+                entries.popitem(last=False)
+            except KeyError:
+                break
+            self.evictions += 1
+
+
+# the same, with every operation holding the shard's lock, for free-threaded interpreters
+class _LockedCacheShard(_CacheShard):
+
+    __slots__ = ('lock',)
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            return super().get(key)
+
+    def put(self, key, romanized: str):
+        with self.lock:
+            super().put(key, romanized)
+
+    def resize(self, maxsize: int):
+        with self.lock:
+            super().resize(maxsize)
+
+    def clear(self):
+        with self.lock:
+            super().clear()
+
+
+# persistent word cache shared across runs, threads and processes, stored in a SQLite database at path
+# entries are keyed by HangulRomanizer.fingerprint, which covers both the configuration and the rule set,
+# so results from differently configured romanizers or from older versions of this module are never reused
+# new entries are buffered and written write_batch at a time (call flush() to write them out sooner)
+# each thread reads through its own connection and buffers its new entries separately, so lookups and writes from
+# different threads never wait on each other; flush() (and the flush at exit) writes out the entries buffered by
+# every thread
+class PersistentCache:
+
+    def __init__(self, path, write_batch: int = 256, timeout: float = 30.0):
+        self.path = os.fspath(path)
+        self.write_batch = write_batch
+        self.timeout = timeout
+        self._local = threading.local()
+        self._buffers_pid = None
+        self._buffers()
+        self._state()
+        atexit.register(self.flush)
+
+    # (thread, write buffer) of every thread using the cache, and the lock guarding the list, replaced after a fork
+    # (the lock may have been held by another thread); the lock is only taken when a thread first uses the cache and
+    # by flush() and clear(), never on lookups and writes
+    def _buffers(self):
+        if self._buffers_pid != os.getpid():
+            self._buffers_lock = threading.Lock()
+            self._buffer_list = []
+            self._buffers_pid = os.getpid()
+        return self._buffer_list
+
+    # per-thread (and per-process, since connections must not be shared across a fork) connection and write buffer
+    def _state(self):
+        state = self._local
+        if getattr(state, 'pid', None) != os.getpid():
+            import sqlite3
+
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute('PRAGMA journal_mode=WAL') # readers and writers in other processes don't block each other
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS romanizations (fingerprint TEXT NOT NULL, word TEXT NOT NULL, '
+                               'romanized TEXT NOT NULL, PRIMARY KEY (fingerprint, word)) WITHOUT ROWID')
+            connection.commit()
+            state.connection = connection
+            state.pending = {}
+            buffers = self._buffers()
+            with self._buffers_lock:
+                buffers.append((threading.current_thread(), state.pending))
+            state.pid = os.getpid()
+        return state
+
+    # entries still buffered by other threads aren't seen until they are written, which only costs a recomputation
+    def get(self, fingerprint: str, word: str):
+        state = self._state()
+        romanized = state.pending.get((fingerprint, word))
+        if romanized is None:
+            row = state.connection.execute('SELECT romanized FROM romanizations WHERE fingerprint = ? AND word = ?',
+                                           (fingerprint, word)).fetchone()
+            if row is not None:
+                romanized = row[0]
+        return romanized
+
+    def put(self, fingerprint: str, word: str, romanized: str):
+        state = self._state()
+        state.pending[fingerprint, word] = romanized
+        if len(state.pending) >= self.write_batch:
+            PersistentCache._write(state.connection, state.pending)
+
+    # write out buffered entries
+    # concurrent writers may insert the same entry, which is harmless since it is always identical
+    def flush(self):
+        connection = self._state().connection
+        buffers = self._buffers()
+        with self._buffers_lock:
+            registered = list(buffers)
+            buffers[:] = [(thread, pending) for thread, pending in buffers if thread.is_alive()]
+        for thread, pending in registered:
+            PersistentCache._write(connection, pending)
+
+    # write the entries of a buffer that its thread may still be adding to; entries are only removed once they are
+    # written, and a removed entry that was just added again can only have had the same value, so none are lost
+    @staticmethod
+    def _write(connection, pending: dict):
+        entries = pending.copy()
+        if not entries:
+            return
+        with connection:
+            connection.executemany('INSERT OR IGNORE INTO romanizations VALUES (?, ?, ?)',
+                                   [(fingerprint, word, romanized) for (fingerprint, word), romanized in entries.items()])
+        for key in entries:
+            pending.pop(key, None)
+
+    # remove every entry, or only those with the given fingerprint
+    def clear(self, fingerprint: str | None = None):
+        state = self._state()
+        buffers = self._buffers()
+        with self._buffers_lock:
+            for thread, pending in buffers:
+                pending.clear()
+        with state.connection:
+            if fingerprint is None:
+                state.connection.execute('DELETE FROM romanizations')
+            else:
+                state.connection.execute('DELETE FROM romanizations WHERE fingerprint = ?', (fingerprint,))
+
+    def __len__(self):
+        self.flush()
+        return self._state().connection.execute('SELECT COUNT(*) FROM romanizations').fetchone()[0]
+
+
+# read-only precomputed romanizations of a fixed word list, stored in a binary file that is memory-mapped
+# rather than loaded, so opening a snapshot costs the same regardless of its size and entries are only read when looked up
+# build one with LexiconSnapshot.build() (or HangulRomanizer.build_snapshot()) and pass it (or its path) to a
+# HangulRomanizer with the same fingerprint as snapshot=...
+#
+# file layout (native byte order, recorded in the header):
+#   header: magic, byte order, fingerprint (sha256 digest), entry count, slot count
+#   slots: slot count uint32 entry numbers (1-based, 0 = empty), an open-addressing hash table over crc32(word)
+#   offsets: 2*(entry count) + 1 uint32 offsets into the data, entry i's word is data[offsets[2i]:offsets[2i + 1]]
+#            and its romanization is data[offsets[2i + 1]:offsets[2i + 2]]
+#   data: UTF-8 words and romanizations
+class LexiconSnapshot:
+
+    _header = struct.Struct('<8sc32sII')
+    _magic = b'KRLEXSN1'
+    _byte_order = b'L' if sys.byteorder == 'little' else b'B'
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        with open(self.path, 'rb') as file:
+            self._mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, byte_order, fingerprint, self.entry_count, slot_count = LexiconSnapshot._header.unpack_from(self._mapped)
+        except struct.error:
+            magic = None
+        if magic != LexiconSnapshot._magic:
+            self._mapped.close()
+            raise ValueError(f'{self.path} is not a lexicon snapshot')
+        if byte_order != LexiconSnapshot._byte_order:
+            self._mapped.close()
+            raise ValueError(f'{self.path} was built on a machine with a different byte order')
+        self.fingerprint = fingerprint.hex()
+
+        slots_start = LexiconSnapshot._header.size
+        offsets_start = slots_start + 4*slot_count
+        self._data_start = offsets_start + 4*(2*self.entry_count + 1)
+        view = memoryview(self._mapped)
+        self._slots = view[slots_start:offsets_start].cast('I')
+        self._offsets = view[offsets_start:self._data_start].cast('I')
+        self._mask = slot_count - 1
+        view.release()
+
+    def __len__(self):
+        return self.entry_count
+
+    def get(self, word: str):
+        key = word.encode('utf8')
+        slots, offsets, mapped = self._slots, self._offsets, self._mapped
+        slot = zlib.crc32(key) & self._mask
+        while True:
+            entry = slots[slot]
+            if entry == 0:
+                return None
+            entry = 2*(entry - 1)
+            word_start = self._data_start + offsets[entry]
+            romanized_start = self._data_start + offsets[entry + 1]
+            if mapped[word_start:romanized_start] == key:
+                return mapped[romanized_start:self._data_start + offsets[entry + 2]].decode('utf8')
+            slot = (slot + 1) & self._mask
+
+    def close(self):
+        self._slots.release()
+        self._offsets.release()
+        self._mapped.close()
+
+    # precompute the romanizations of words (an iterable of single words; duplicates and empty strings are skipped)
+    # with hangul_romanizer and write them to a snapshot at path, returning the opened snapshot
+    @staticmethod
+    def build(path, words, hangul_romanizer):
+        path = os.fspath(path)
+        entries = {}
+        for word in words:
+            if word and word not in entries:
+                entries[word] = hangul_romanizer._romanize_word(word).encode('utf8')
+
+        slot_count = 1
+        while slot_count < 2*len(entries): # keep the table at most half full so probe sequences stay short
+            slot_count *= 2
+        slots = array('I', bytes(4*slot_count))
+        offsets = array('I', [0])
+        data = bytearray()
+        for entry, (word, romanized) in enumerate(entries.items(), 1):
+            key = word.encode('utf8')
+            slot = zlib.crc32(key) & (slot_count - 1)
+            while slots[slot] != 0:
+                slot = (slot + 1) & (slot_count - 1)
+            slots[slot] = entry
+            data += key
+            offsets.append(len(data))
+            data += romanized
+            offsets.append(len(data))
+        if len(data) > 0xFFFFFFFF:
+            raise ValueError('lexicon snapshots are limited to 4 GiB of words and romanizations')
+
+        with open(path + '.tmp', 'wb') as file:
+            file.write(LexiconSnapshot._header.pack(LexiconSnapshot._magic, LexiconSnapshot._byte_order,
+                                                    bytes.fromhex(hangul_romanizer.fingerprint), len(entries), slot_count))
+            file.write(slots.tobytes())
+            file.write(offsets.tobytes())
+            file.write(data)
+        os.replace(path + '.tmp', path)
+        return LexiconSnapshot(path)
+
+
+# version of the sound change rules, included in HangulRomanizer.fingerprint
+# NOTE: bump this with any change to this module that changes how some word is romanized; the fingerprint also
+# covers the phonetic tables, but not the code of the rules, and edits that leave every romanization as it was keep
+# persistent caches, lexicon snapshots and incremental manifests valid
+RULESET_VERSION = 1
+
+_ruleset_digest = None
+
+def _get_ruleset_digest():
+    global _ruleset_digest
+    if _ruleset_digest is None:
+        tables = (RULESET_VERSION, HangulRomanizer.initial_consonant_phonetics, HangulRomanizer.vowel_phonetics,
+                  HangulRomanizer.final_consonant_phonetics, HangulRomanizer.word_initial_vowels,
+                  HangulRomanizer.word_final_vowels, HangulRomanizer.phonemes)
+        _ruleset_digest = hashlib.sha256(repr(tables).encode()).hexdigest()
+    return _ruleset_digest
+
+
+# compound and Sino-Korean words whose syllable boundaries don't follow the regular sound changes
+# each entry is a pattern of Hangul blocks with a '|' marking the boundary it applies to, and one of the rules
+#   linking: semantic ㅇ linking, the ㅇ after the boundary becomes ㄴ if the syllable before it ends in a consonant
+#            (e.g., '|잎' makes 꽃잎 꼰닢 and '|연필' makes 색연필 생년필)
+#   merging: the final consonant is dropped and the next syllable starts with ㄷ (e.g., '맛|없' makes 맛없- 마덦-)
+#   tensing: the initial consonant after the boundary is tensed (e.g., '글|자')
+# linking is applied before merging or tensing at the same boundary, and merging takes precedence over tensing
+# entries are compiled into an Aho-Corasick automaton, so every applicable entry in a word is found in a single scan
+# whose cost doesn't depend on the size of the lexicon
+# lexicons are immutable once constructed, and load() reads entries from a file of tab-separated pattern and rule
+class ExceptionLexicon:
+
+    linking = 1
+    merging = 2
+    tensing = 4
+    rules = {'linking': linking, 'merging': merging, 'tensing': tensing}
+
+    default_entries = (
+        # semantically meaningful second halves of compound words that begin with 야, 여, 요, 유, 이
+        # NOTE: it's hard to generalize this because it depends on the semantics of the word
+        ('|역', 'linking'), ('|염', 'linking'), ('|엿', 'linking'), ('|유', 'linking'), ('|율', 'linking'),
+        ('|윷', 'linking'), ('|잎', 'linking'), ('|여름', 'linking'), ('|여비', 'linking'), ('|여성', 'linking'),
+        ('|여우', 'linking'), ('|연필', 'linking'), ('|열차', 'linking'), ('|요기', 'linking'), ('|이불', 'linking'),
+        ('담|요', 'linking'), ('들|일', 'linking'), ('막|일', 'linking'), ('맨|입', 'linking'), ('물|약', 'linking'),
+        ('삯|일', 'linking'), ('알|약', 'linking'),
+        ('끝|없', 'merging'), ('맛|없', 'merging'),
+        # common compound words and Sino-Korean words that induce tensing
+        ('글|자', 'tensing'), ('될|지', 'tensing'), ('발|자', 'tensing'), ('발|전', 'tensing'), ('실|제', 'tensing'),
+        ('여|권', 'tensing'), ('을|지', 'tensing'), ('절|대', 'tensing'), ('할|지', 'tensing')
+    )
+
+    _default = None
+
+    def __init__(self, entries=None):
+        if entries is None:
+            entries = ExceptionLexicon.default_entries
+        self.entries = tuple(dict.fromkeys((pattern, rule) for pattern, rule in entries))
+        for pattern, rule in self.entries:
+            if rule not in ExceptionLexicon.rules:
+                raise ValueError(f'unknown exception rule {rule!r} for {pattern!r}')
+            if pattern.count('|') != 1 or not _hangul_run.fullmatch(pattern.replace('|', '')):
+                raise ValueError(f'exception pattern {pattern!r} must be Hangul blocks with a single \'|\' marking a boundary')
+        self.digest = hashlib.sha256(repr(sorted(self.entries)).encode()).hexdigest()
+
+        # trie of the patterns (goto), failure links and, for every state, the (length, boundary offset, rule)
+        # of each pattern that ends there, including those reached through failure links
+        goto = [{}]
+        outputs = [[]]
+        for pattern, rule in self.entries:
+            state = 0
+            for character in pattern.replace('|', ''):
+                next_state = goto[state].get(character)
+                if next_state is None:
+                    next_state = goto[state][character] = len(goto)
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append((len(pattern) - 1, pattern.index('|'), ExceptionLexicon.rules[rule]))
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and character not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(character, 0)
+                outputs[next_state] += outputs[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(output) for output in outputs]
+
+    def __len__(self):
+        return len(self.entries)
+
+    # lexicon of the default entries
+    @classmethod
+    def default(cls):
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    # read a lexicon from a UTF-8 file with one tab-separated pattern and rule per line (blank lines and lines
+    # starting with '#' are skipped), added to the default entries unless include_defaults = False
+    @classmethod
+    def load(cls, path, include_defaults: bool = True):
+        entries = list(cls.default_entries) if include_defaults else []
+        with open(path, encoding='utf8') as file:
+            for line_number, line in enumerate(file, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                fields = line.split('\t')
+                if len(fields) != 2:
+                    raise ValueError(f'{os.fspath(path)}:{line_number}: expected a pattern and a rule separated by a tab')
+                entries.append((fields[0].strip(), fields[1].strip()))
+        return cls(entries)
+
+    # rules that apply to a run of Hangul blocks, as a dictionary from boundary (the index of the syllable before it)
+    # to the bitwise or of the rules
+    def find(self, word: str):
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        last_boundary = len(word) - 2
+        found = {}
+        state = 0
+        for end, character in enumerate(word):
+            while state and character not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(character, 0)
+            for length, offset, rule in outputs[state]:
+                boundary = end - length + offset
+                if 0 <= boundary <= last_boundary:
+                    found[boundary] = found.get(boundary, 0) | rule
+        return found
+
+
+# list of romanized strings returned by HangulRomanizer.romanize_many(), in input order
+# unique_strings and unique_words record how many distinct strings and words the batch contained
+class RomanizedBatch(list):
+    unique_strings = 0
+    unique_words = 0
+
+
+# opt-in instrumentation for HangulRomanizer (pass as HangulRomanizer(instrumentation=...))
+# counts how often each sound change rule fires in the words that are actually romanized (i.e., not served from
+# a cache) and, if timing = True, the time spent in each phase; snapshot() exports everything as a plain dictionary
+# every thread counts into its own tally, which snapshot() adds up, so instrumented romanizers can be shared by threads
+class Instrumentation:
+
+    phases = ('decomposition', 'first_pass', 'second_pass', 'join')
+
+    def __init__(self, timing: bool = False):
+        self.timing = timing
+        self._local = threading.local()
+        self._tallies_lock = threading.Lock() # guards the list of tallies, not the counting itself
+        self._tallies = []
+
+    # counters of the current thread
+    def _tally(self):
+        tally = getattr(self._local, 'tally', None)
+        if tally is None:
+            tally = self._local.tally = _InstrumentationTally()
+            with self._tallies_lock:
+                self._tallies.append(tally)
+        return tally
+
+    def reset(self):
+        with self._tallies_lock:
+            for tally in self._tallies:
+                tally.reset()
+
+    def snapshot(self):
+        words = syllables = 0
+        rule_counts = Counter()
+        phase_seconds = dict.fromkeys(Instrumentation.phases, 0.0)
+        with self._tallies_lock:
+            for tally in self._tallies:
+                words += tally.words
+                syllables += tally.syllables
+                rule_counts.update(dict.copy(tally.rule_counts))
+                for phase, seconds in dict.copy(tally.phase_seconds).items():
+                    phase_seconds[phase] += seconds
+        return {
+            'words': words,
+            'syllables': syllables,
+            'rules': dict(rule_counts),
+            'phase_seconds': phase_seconds if self.timing else {}
+        }
+
+
+class _InstrumentationTally:
+
+    __slots__ = ('words', 'syllables', 'rule_counts', 'phase_seconds')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.words = 0
+        self.syllables = 0
+        self.rule_counts = Counter()
+        self.phase_seconds = dict.fromkeys(Instrumentation.phases, 0.0)
+
+
+# instances are immutable after construction: the configuration, exceptions and compiled tables never change, and
+# the only state that does (the word caches, instrumentation and memoized rule names) is safe to use from several
+# threads at once, so a single romanizer can be shared by every thread of a process, including on free-threaded Python
 class HangulRomanizer:
     
     # transliterations of syllable-initial consonants
@@ -83,9 +697,59 @@ class HangulRomanizer:
         'i'
     ]
 
+    # names of the constructor options that affect romanization
+    _option_names = ('na_neo_ye', 'ne_ni', 'show_h', 'show_hada_h', 'voiced_double', 'sh', 'oo', 'ee', 'always_tense', 'no_y')
+
     hangul_blocks = 44032
     block_count = 11172
 
+    # vowels of blocks whose pronunciation depends on their position in the word
+    # 의 is decomposed like any other block ('eui', which later becomes 'i'), except that
+    # word-initially it keeps its full pronunciation and word-finally it becomes '에'
+    # NOTE: the word-final change should only apply to the grammatical particle 의
+    word_initial_vowels = {'의': 'q'} # placeholder for non-modified ㅢ
+    word_final_vowels = {'의': 'e'}
+
+    # compound words and Sino-Korean words with irregular sound changes are listed in ExceptionLexicon
+
+    # every string that can occupy a slot of a word's phoneme list, in any configuration
+    # while a word is being romanized, phonemes are stored as their indices into this tuple (see _decompose)
+    phonemes = (
+        '-', '',                                                        # syllable separator and empty slot
+        'g', 'kk', 'n', 'd', 'tt', 'r', 'm', 'b', 'pp', 's', 'ss',      # consonants
+        'j', 'jj', 'ch', 'k', 't', 'p', 'h', 'l', 'ng', 'ʰ',
+        'gs', 'nj', 'nh', 'rg', 'rm', 'rb', 'rs', 'rt', 'rp', 'rh', 'bs',  # consonant clusters
+        'gg', 'dd', 'bb', 'sh', 'ssh',                                  # configuration-dependent spellings
+        'a', 'ae', 'ya', 'yae', 'eo', 'e', 'yeo', 'ye', 'o', 'wa',      # vowels
+        'wae', 'we', 'yo', 'oo', 'weo', 'wi', 'yoo', 'eu', 'eui', 'i',
+        'q',                                                            # placeholder for non-modified ㅢ
+        'u', 'yu', 'ee', 'wee'                                          # configuration-dependent spellings
+    )
+    phoneme_count = len(phonemes)
+    _phoneme_codes = {phoneme: code for code, phoneme in enumerate(phonemes)}
+    # decoding map for codecs.charmap_decode(), which turns a whole phoneme list back into a string in one call
+    _phoneme_decoding = dict(enumerate(phonemes))
+
+    # (initial, vowel, final, '-') phoneme codes of every Hangul block as 4-byte strings, indexed by block_ord
+    # built once on first use by _build_syllable_table()
+    _syllable_table = None
+
+    @classmethod
+    def _build_syllable_table(cls):
+        codes = cls._phoneme_codes
+        finals = [bytes((codes[final], codes['-'])) for final in cls.final_consonant_phonetics]
+        table = []
+        for initial in cls.initial_consonant_phonetics:
+            for vowel in cls.vowel_phonetics:
+                prefix = bytes((codes[initial], codes[vowel]))
+                table += [prefix + final for final in finals]
+        cls._syllable_table = tuple(table)
+        return cls._syllable_table
+
+    @classmethod
+    def _decode(cls, codes):
+        return [cls.phonemes[code] for code in codes]
+
     @staticmethod
     def tense_consonant(phoneme):
         match phoneme:
@@ -99,7 +763,13 @@ class HangulRomanizer:
     
     def __init__(self, na_neo_ye: bool = False, ne_ni: bool = True, \
                  show_h: int = 0, show_hada_h: bool = True, voiced_double: bool = False, sh: bool = True, oo: bool = False, ee: bool = False, \
-                 always_tense: bool = False, no_y: bool = False):
+                 always_tense: bool = False, no_y: bool = False, \
+                 cache_size: int = 4096, cache: RomanizationCache | None = None, \
+                 instrumentation: Instrumentation | None = None, \
+                 persistent_cache: PersistentCache | str | os.PathLike | None = None, \
+                 snapshot: LexiconSnapshot | str | os.PathLike | None = None, \
+                 exceptions: ExceptionLexicon | str | os.PathLike | None = None, \
+                 legacy_whitespace: bool = False):
 
         # situational romanization preferences
 
@@ -126,6 +796,264 @@ class HangulRomanizer:
                                                 # NOTE: this configuration option exists because, for example, 자 and 쟈 sound extremely similar
                                                 # and so some people might not find it critical for their use case to distinguish between the two
 
+        # how strings are split into words (this doesn't affect the romanization of any word, so it isn't part of
+        # _config or the fingerprint)
+        self.legacy_whitespace = legacy_whitespace  # if True, strip leading and trailing whitespace and only split words at ASCII
+                                                        # spaces, like earlier versions; otherwise words are separated by any Unicode
+                                                        # whitespace, which is copied through exactly
+
+        # every option that affects the output of _romanize_word, used to key cached results
+        # (in the same order as _option_names)
+        self._config = (na_neo_ye, ne_ni, show_h, show_hada_h, voiced_double, sh, oo, ee, always_tense, no_y)
+
+        # compound and Sino-Korean exceptions (a path is loaded with ExceptionLexicon.load)
+        if exceptions is None:
+            exceptions = ExceptionLexicon.default()
+        elif not isinstance(exceptions, ExceptionLexicon):
+            exceptions = ExceptionLexicon.load(exceptions)
+        self.exceptions = exceptions
+
+        # compiled first-round sound changes
+        self._boundary_table = self._compile_boundary_table()
+
+        # compiled second-round sound changes and configuration-dependent spellings
+        self._final_table, self._last_final_table, self._style_table = self._compile_second_pass_tables()
+
+        # word-level memoization (pass a shared RomanizationCache to reuse results across instances,
+        # or cache_size = 0 to disable caching entirely)
+        if cache is not None:
+            self.cache = cache
+        elif cache_size > 0:
+            self.cache = RomanizationCache(cache_size)
+        else:
+            self.cache = None
+
+        # identifies the rule set and configuration, for keying results that outlive this process
+        self.fingerprint = hashlib.sha256(repr((_get_ruleset_digest(), self._config, exceptions.digest)).encode()).hexdigest()
+
+        # optional persistent cache shared across runs and processes, consulted after the in-memory cache
+        if persistent_cache is not None and not isinstance(persistent_cache, PersistentCache):
+            persistent_cache = PersistentCache(persistent_cache)
+        self.persistent_cache = persistent_cache
+
+        # optional precomputed romanizations, consulted before the persistent cache
+        # (a snapshot built under a different configuration or rule set would give wrong results, so it is rejected)
+        if snapshot is not None and not isinstance(snapshot, LexiconSnapshot):
+            snapshot = LexiconSnapshot(snapshot)
+        if snapshot is not None and snapshot.fingerprint != self.fingerprint:
+            raise ValueError(f'lexicon snapshot {snapshot.path} was built for a different configuration or rule set')
+        self.snapshot = snapshot
+
+        # opt-in rule counters and phase timing (the uninstrumented path is left untouched)
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            self._romanize_hangul = self._romanize_hangul_instrumented
+            self._boundary_rules = {}
+
+
+    # reference implementation of the sound changes at a syllable boundary, given the syllable-final consonant
+    # and the following syllable's initial consonant and vowel (after any special cases have been applied)
+    # returns the new (final, next_initial) pair
+    # NOTE: _romanize_word resolves boundaries with a table compiled from this method (see _compile_boundary_table)
+    # NOTE: the table only resolves one vowel of each group in _boundary_vowel_groups (and one of all other vowels),
+    # so any vowel tested here must be listed in a group of its own there
+    def _resolve_boundary(self, final: str, next_initial: str, next_vowel: str, trace: list | None = None):
+        # preparing syllable-final consonants for sound changes
+        if len(final) == 0:
+            final_change = ''
+            final_carry = ''
+        elif len(final) == 1:
+            final_change = ''
+            final_carry = final
+        else:
+            match final:
+                case 'kk' | 'gs' | 'bs' | 'ss' | 'ng' | 'ch':
+                    final_change = ''
+                    final_carry = final
+                case 'rs':
+                    final_change = 'r'
+                    final_carry = 'v' # placeholder for ㄽ
+                case _:
+                    final_change = final[0]
+                    final_carry = final[1]
+
+        if trace is not None:
+            trace.append((None, final_change, final_carry, next_initial))
+
+        # ㄹ assimilation
+        if next_initial == 'n':
+            # ㄹ + ㄴ -> 'l-l'
+            if final_carry == 'r':
+                next_initial = 'l'
+                final_carry = 'l'
+        elif next_initial == 'r':
+            match final_carry:
+                # ㄴ + ㄹ -> 'l-l', ㄹ + ㄹ -> 'l-l'
+                case 'n' | 'r':
+                    next_initial = 'l'
+                    final_carry = 'l'
+                case '':
+                    pass
+                # when following a consonant, ㄹ induces nasalization like ㄴ
+                case _:
+                    next_initial = 'n'
+
+        if trace is not None:
+            trace.append(('l_assimilation', final_change, final_carry, next_initial))
+
+        # nasalization
+        if next_initial in ('n', 'm'):
+            match final_carry:
+                case 'g' | 'kk' | 'gs' | 'k':
+                    final_change = 'ng'
+                    final_carry = ''
+                case 'b' | 'bs' | 'p':
+                    final_change = 'm'
+                    final_carry = ''
+                case 'd' | 's' | 'ss' | 'j' | 'ch' | 't' | 'h':
+                    final_change = 'n'
+                    final_carry = ''
+                case '':
+                    if final_change == 'b':
+                        final_change = 'm'
+
+        if trace is not None:
+            trace.append(('nasalization', final_change, final_carry, next_initial))
+
+        # palatalization
+        # NOTE: this should only occur for 이, 히, 여, 혀 as grammatical particles, but oh well
+        if next_vowel in ('i', 'yeo'):
+            if next_initial == '':
+                if final_carry == 'd':
+                    next_initial = 'j'
+                    final_carry = ''
+                elif final_carry == 't':
+                    next_initial = 'ch'
+                    final_carry = ''
+            elif next_initial == 'h':
+                if final_carry in ('d', 's', 'ss', 'j', 'ch', 't', 'h'):
+                    next_initial = 'ch'
+                    final_carry = ''
+
+        if trace is not None:
+            trace.append(('palatalization', final_change, final_carry, next_initial))
+
+        # aspiration
+        if final_carry == 'h':
+            match next_initial:
+                case 'g':
+                    next_initial = 'k'
+                    final_carry = ''
+                case 'd':
+                    next_initial = 't'
+                    final_carry = ''
+                case 's':
+                    next_initial = 'ss'
+                    final_carry = ''
+                case 'j':
+                    next_initial = 'ch'
+                    final_carry = ''
+
+        if trace is not None:
+            trace.append(('aspiration', final_change, final_carry, next_initial))
+
+        # ㅎ linking
+        if next_initial == 'h':
+            match final_carry:
+                case 'g' | 'kk' | 'gs':
+                    next_initial = 'k'
+                    final_carry = ''
+                case 'd' | 's' | 'ss' | 'j' | 'ch' | 'v':
+                    next_initial = 't'
+                    final_carry = ''
+                case 'b' | 'bs':
+                    next_initial = 'p'
+                    final_carry = ''
+                case _:
+                    if self.show_h == 0:
+                        # if self.show_hada_h = True, create an exception for 하다, 한, 했다, etc.
+                        # NOTE: this implementation is over-sensitive because it doesn't consider semantics
+                        if not (self.show_hada_h and next_vowel in ('a', 'ae')):
+                            if final_carry not in ('', 'ng'):
+                                next_initial = final_carry
+                                final_carry = ''
+                            else:
+                                next_initial = ''
+                    elif self.show_h == 1:
+                        next_initial = 'ʰ'
+
+        if trace is not None:
+            trace.append(('h_linking', final_change, final_carry, next_initial))
+
+        # handling placeholder for ㄽ
+        if final_carry == 'v':
+            match next_initial:
+                case '': # ㄽ + ㅇ -> ㄹ + ㅆ
+                    next_initial = 'ss'
+                    final_carry = ''
+                case 'b': # ㄽ + ㅂ -> ㄹ + ㅃ
+                    next_initial = 'pp'
+                    final_carry = ''
+                case _:
+                    final_carry = ''
+
+        if trace is not None:
+            trace.append(('rs_cluster', final_change, final_carry, next_initial))
+
+        # linking
+        if next_initial == '':
+            match final_carry:
+                case 'ks' | 'bs':
+                    next_initial = 's'
+                    final_change = final_carry[0]
+                    final_carry = ''
+                case '' | 'ng':
+                    pass
+                case 'h': # for syllables ending in ㅎ, ㄶ, and ㅀ
+                    next_initial = final_change
+                    final_change = ''
+                    final_carry = ''
+                case _: # general linking case
+                    next_initial = final_carry
+                    final_carry = ''
+
+        if trace is not None:
+            trace.append(('linking', final_change, final_carry, next_initial))
+
+        # handling standard cases
+        return final_change + final_carry, next_initial
+
+
+    # compile _resolve_boundary into a lookup table over every (final, next_initial, next_vowel) triple
+    # keys and values are phoneme codes: (final*phoneme_count + next_initial)*phoneme_count + next_vowel
+    # maps to a (final, next_initial) pair
+    # only self.show_h and self.show_hada_h affect boundaries, so tables are shared between instances
+    # _resolve_boundary only tells these groups of next vowels apart from each other and from every other vowel, so
+    # each group is only resolved once (which keeps constructing the first instance cheap)
+    # TestBoundaryTable checks every entry against _resolve_boundary, so a vowel missing here fails the tests
+    _boundary_tables = {}
+    _boundary_vowel_groups = (('i', 'yeo'), ('a', 'ae'))
+
+    def _compile_boundary_table(self):
+        key = (self.show_h, self.show_hada_h)
+        table = HangulRomanizer._boundary_tables.get(key)
+        if table is None:
+            codes = HangulRomanizer._phoneme_codes
+            count = HangulRomanizer.phoneme_count
+            grouped = {vowel for group in HangulRomanizer._boundary_vowel_groups for vowel in group}
+            vowel_groups = HangulRomanizer._boundary_vowel_groups \
+                           + (tuple(vowel for vowel in HangulRomanizer.vowel_phonetics if vowel not in grouped),)
+            table = {}
+            for final in HangulRomanizer.final_consonant_phonetics:
+                for next_initial in HangulRomanizer.initial_consonant_phonetics:
+                    for vowel_group in vowel_groups:
+                        resolved_final, resolved_initial = self._resolve_boundary(final, next_initial, vowel_group[0])
+                        resolved = (codes[resolved_final], codes[resolved_initial])
+                        for next_vowel in vowel_group:
+                            table[(codes[final]*count + codes[next_initial])*count + codes[next_vowel]] = resolved
+            HangulRomanizer._boundary_tables[key] = table
+        return table
+
 
     def _romanize_word(self, word: str):
         if len(word) == 0:
@@ -138,395 +1066,1445 @@ class HangulRomanizer:
             elif word == '네가':
                 return 'ni-ga'
 
-        phoneme_list = []
-        
-        # parsing Hangul and converting to "naive" letter-by-letter romanization
-        for syllable in range(len(word)):
-            block_ord = ord(word[syllable]) - HangulRomanizer.hangul_blocks
-
-            if block_ord == 7000: # 의
-                phoneme_list.append('')
-                if syllable == 0:
-                    phoneme_list.append('q') # placeholder for non-modified ㅢ
-                elif syllable == len(word) - 1: # 의 -> '에' (NOTE: this should only apply to the grammatical particle 의)
-                    if self.na_neo_ye and syllable == 1 and word[0] in ('나', '너'):
-                        phoneme_list.append('ye')
-                    else:
-                        phoneme_list.append('e')
-                else:
-                    phoneme_list.append('eui')
-                phoneme_list.append('')
-            elif 0 <= block_ord < HangulRomanizer.block_count:
-                final = HangulRomanizer.final_consonant_phonetics[block_ord % HangulRomanizer.final_consonant_count]
-                trunc = block_ord // HangulRomanizer.final_consonant_count
-                vowel = HangulRomanizer.vowel_phonetics[trunc % HangulRomanizer.vowel_count]
-                initial = HangulRomanizer.initial_consonant_phonetics[trunc // HangulRomanizer.vowel_count]
-                phoneme_list.append(initial)
-                phoneme_list.append(vowel)
-                phoneme_list.append(final)
-            else:
-                phoneme_list.append('x') # placeholder for non-Korean characters
-                phoneme_list.append(word[syllable])
-                phoneme_list.append('x')
-                
-            phoneme_list.append('-')
+        # fast path: words made up entirely of Hangul
+        if _hangul_run.fullmatch(word):
+            return self._romanize_hangul(word, True, True)
+
+        # otherwise, romanize each maximal run of Hangul and copy the characters in between through unchanged
+        # runs are separated by hyphens, except before punctuation at the end of a clause and around quotation marks
+        romanized = []
+        position = 0
+        for run in _hangul_run.finditer(word):
+            start, end = run.span()
+            if start > 0:
+                self._append_non_hangul(romanized, word[position:start], position > 0)
+                if not (start == 1 and word[0] in ('\'', '"')):
+                    romanized.append('-')
+            romanized.append(self._romanize_hangul(run.group(), start == 0, end == len(word)))
+            position = end
+        if position < len(word):
+            self._append_non_hangul(romanized, word[position:], position > 0)
+        return ''.join(romanized)
 
-        # first round of sound changes
-        for syllable in range(len(word) - 1):
-            initial = 4*syllable
-            final = 4*syllable + 2
-            next_initial = initial + 4
 
-            if phoneme_list[final] == 'x' or phoneme_list[next_initial] == 'x':
-                continue
+    @staticmethod
+    def _append_non_hangul(romanized: list, characters: str, after_hangul: bool):
+        if after_hangul and characters[0] not in ('!', ',', '.', '?', '\'', '"'):
+            romanized.append('-')
+        romanized.append(characters)
+
+
+    # romanize a run of Hangul blocks
+    # word_start and word_end indicate whether the run begins and ends the word it was taken from
+    def _romanize_hangul(self, word: str, word_start: bool, word_end: bool):
+        phoneme_list = self._decompose(word, word_start, word_end)
+        self._first_pass(phoneme_list, word)
+        self._second_pass(phoneme_list, word)
+        phoneme_list.pop() # trailing hyphen
+        return codecs.charmap_decode(phoneme_list, 'strict', HangulRomanizer._phoneme_decoding)[0]
 
-            two_syllable = word[syllable : syllable + 2]
-            next_syllable = word[syllable + 1]
-            next_two_syllable = word[syllable + 1 : syllable + 3]
-
-            # semantic ㅇ linking for compound words where the first half ends in a consonant
-            # and the second (semantically meaningful) half begins with 야, 여, 요, 유, 이
-            # (e.g., 꽃잎 becomes 꼰닢, 색연필 becomes 생년필)
-            # NOTE: it's hard to generalize this because it depends on the semantics of the word
-            if phoneme_list[final] != '' and (next_syllable in ('역', '염', '엿', '유', '율', '윷', '잎') \
-                                              or next_two_syllable in ('여름', '여비', '여성', '여우', '연필', '열차', '요기', '이불')):
-                phoneme_list[next_initial] = 'n'
-
-            # special cases
-            match two_syllable:
-
-                # 맛없- becomes 마덦-
-                case '끝없' | '맛없':
-                    phoneme_list[final] = ''
-                    phoneme_list[next_initial] = 'd'
-                    continue
 
-                # common compound words and Sino-Korean words that induce tensing
-                case '글자' | '될지' | '발자' | '발전' | '실제' | '여권' | '을지' | '절대' | '할지':
-                    phoneme_list[next_initial] = HangulRomanizer.tense_consonant(phoneme_list[next_initial])
+    # same as _romanize_hangul, but records rule counts and phase timings in self.instrumentation
+    def _romanize_hangul_instrumented(self, word: str, word_start: bool, word_end: bool):
+        instrumentation = self.instrumentation
+        tally = instrumentation._tally()
+        clock = time.perf_counter if instrumentation.timing else int
+
+        start = clock()
+        phoneme_list = self._decompose(word, word_start, word_end)
+        decomposed_at = clock()
+        decomposed = HangulRomanizer._decode(phoneme_list)
+
+        first_pass_at = clock()
+        self._first_pass(phoneme_list, word)
+        first_passed_at = clock()
+        first_passed = HangulRomanizer._decode(phoneme_list)
+
+        second_pass_at = clock()
+        self._second_pass(phoneme_list, word)
+        second_passed_at = clock()
+        self._count_rules(word, decomposed, first_passed, HangulRomanizer._decode(phoneme_list), tally.rule_counts)
+
+        join_at = clock()
+        phoneme_list.pop() # trailing hyphen
+        romanized = codecs.charmap_decode(phoneme_list, 'strict', HangulRomanizer._phoneme_decoding)[0]
+        joined_at = clock()
+
+        tally.words += 1
+        tally.syllables += len(word)
+        if instrumentation.timing:
+            phase_seconds = tally.phase_seconds
+            phase_seconds['decomposition'] += decomposed_at - start
+            phase_seconds['first_pass'] += first_passed_at - first_pass_at
+            phase_seconds['second_pass'] += second_passed_at - second_pass_at
+            phase_seconds['join'] += joined_at - join_at
+        return romanized
+
+
+    # names of the second round rules, by syllable-final consonant after the first round
+    _final_rules = {
+        'g': 'final_k', 'kk': 'final_k', 'gs': 'final_k', 'k': 'final_k',
+        'n': 'final_n', 'nj': 'final_n', 'nh': 'final_n',
+        'd': 'final_t', 's': 'final_t', 'ss': 'final_t', 'j': 'final_t', 'ch': 'final_t', 't': 'final_t', 'h': 'final_t',
+        'r': 'final_l',
+        'rg': 'cluster_rg',
+        'rm': 'final_m', 'm': 'final_m',
+        'rb': 'cluster_rb',
+        'rs': 'cluster_l', 'rt': 'cluster_l', 'rh': 'cluster_l',
+        'rp': 'final_p', 'b': 'final_p', 'bs': 'final_p', 'p': 'final_p'
+    }
+
+    # reconstruct which rules _first_pass and _second_pass applied to a word from the phoneme list after
+    # decomposition, after the first round and after the second round
+    def _count_rules(self, word: str, decomposed: list, first_passed: list, second_passed: list, rule_counts: Counter):
+        exceptions = self.exceptions.find(word)
+        for syllable in range(len(word) - 1):
+            final = 4*syllable + 2
+            next_initial = final + 2
+            initial_consonant = decomposed[next_initial]
+
+            rules = exceptions.get(syllable)
+            if rules:
+                if rules & ExceptionLexicon.linking and decomposed[final] != '':
+                    rule_counts['semantic_linking'] += 1
+                    initial_consonant = 'n'
+                if rules & ExceptionLexicon.merging:
+                    rule_counts['compound_merging'] += 1
+                    continue
+                if rules & ExceptionLexicon.tensing:
+                    rule_counts['compound_tensing'] += 1
                     continue
 
-                # more semantic ㅇ linking
-                case '담요' | '들일' | '막일' | '맨입' | '물약' | '삯일' | '알약':
-                    phoneme_list[next_initial] = 'n'
-
-            # preparing syllable-final consonants for sound changes
-            if len(phoneme_list[final]) == 0:
-                final_change = ''
-                final_carry = ''
-            elif len(phoneme_list[final]) == 1:
-                final_change = ''
-                final_carry = phoneme_list[final]
-            else:
-                match phoneme_list[final]:
-                    case 'kk' | 'gs' | 'bs' | 'ss' | 'ng' | 'ch':
-                        final_change = ''
-                        final_carry = phoneme_list[final]
-                    case 'rs':
-                        final_change = 'r'
-                        final_carry = 'v' # placeholder for ㄽ
-                    case _:
-                        final_change = phoneme_list[final][0]
-                        final_carry = phoneme_list[final][1]
-
-            # ㄹ assimilation
-            if phoneme_list[next_initial] == 'n':
-                # ㄹ + ㄴ -> 'l-l'
-                if final_carry == 'r':
-                    phoneme_list[next_initial] = 'l'
-                    final_carry = 'l'
-            elif phoneme_list[next_initial] == 'r':
-                match final_carry:
-                    # ㄴ + ㄹ -> 'l-l', ㄹ + ㄹ -> 'l-l'
-                    case 'n' | 'r':
-                        phoneme_list[next_initial] = 'l'
-                        final_carry = 'l'
-                    case '':
-                        pass
-                    # when following a consonant, ㄹ induces nasalization like ㄴ
-                    case _:
-                        phoneme_list[next_initial] = 'n'
-
-            # nasalization
-            if phoneme_list[next_initial] in ('n', 'm'):
-                match final_carry:
-                    case 'g' | 'kk' | 'gs' | 'k':
-                        final_change = 'ng'
-                        final_carry = ''
-                    case 'b' | 'bs' | 'p':
-                        final_change = 'm'
-                        final_carry = ''
-                    case 'd' | 's' | 'ss' | 'j' | 'ch' | 't' | 'h':
-                        final_change = 'n'
-                        final_carry = ''
-                    case '':
-                        if final_change == 'b':
-                            final_change = 'm'
-
-            # palatalization
-            # NOTE: this should only occur for 이, 히, 여, 혀 as grammatical particles, but oh well
-            if phoneme_list[next_initial + 1] in ('i', 'yeo'):
-                if phoneme_list[next_initial] == '':
-                    if final_carry == 'd':
-                        phoneme_list[next_initial] = 'j'
-                        final_carry = ''
-                    elif final_carry == 't':
-                        phoneme_list[next_initial] = 'ch'
-                        final_carry = ''
-                elif phoneme_list[next_initial] == 'h':
-                    if final_carry in ('d', 's', 'ss', 'j', 'ch', 't', 'h'):
-                        phoneme_list[next_initial] = 'ch'
-                        final_carry = ''
-
-            # aspiration
-            if final_carry == 'h':
-                match phoneme_list[next_initial]:
-                    case 'g':
-                        phoneme_list[next_initial] = 'k'
-                        final_carry = ''
-                    case 'd':
-                        phoneme_list[next_initial] = 't'
-                        final_carry = ''
-                    case 's':
-                        phoneme_list[next_initial] = 'ss'
-                        final_carry = ''
-                    case 'j':
-                        phoneme_list[next_initial] = 'ch'
-                        final_carry = ''
-
-            # ㅎ linking
-            if phoneme_list[next_initial] == 'h':
-                match final_carry:
-                    case 'g' | 'kk' | 'gs':
-                        phoneme_list[next_initial] = 'k'
-                        final_carry = ''
-                    case 'd' | 's' | 'ss' | 'j' | 'ch' | 'v':
-                        phoneme_list[next_initial] = 't'
-                        final_carry = ''
-                    case 'b' | 'bs':
-                        phoneme_list[next_initial] = 'p'
-                        final_carry = ''
-                    case _:
-                        if self.show_h == 0:
-                            # if self.show_hada_h = True, create an exception for 하다, 한, 했다, etc.
-                            # NOTE: this implementation is over-sensitive because it doesn't consider semantics
-                            if not (self.show_hada_h and phoneme_list[next_initial + 1] in ('a', 'ae')):
-                                if final_carry not in ('', 'ng'):
-                                    phoneme_list[next_initial] = final_carry
-                                    final_carry = ''
-                                else:
-                                    phoneme_list[next_initial] = ''
-                        elif self.show_h == 1:
-                            phoneme_list[next_initial] = 'ʰ'
-
-            # handling placeholder for ㄽ
-            if final_carry == 'v':
-                match phoneme_list[next_initial]:
-                    case '': # ㄽ + ㅇ -> ㄹ + ㅆ
-                        phoneme_list[next_initial] = 'ss'
-                        final_carry = ''
-                    case 'b': # ㄽ + ㅂ -> ㄹ + ㅃ
-                        phoneme_list[next_initial] = 'pp'
-                        final_carry = ''
-                    case _:
-                        final_carry = ''
-
-            # linking
-            if phoneme_list[next_initial] == '':
-                match final_carry:
-                    case 'ks' | 'bs':
-                        phoneme_list[next_initial] = 's'
-                        final_change = final_carry[0]
-                        final_carry = ''
-                    case '' | 'ng':
-                        pass
-                    case 'h': # for syllables ending in ㅎ, ㄶ, and ㅀ
-                        phoneme_list[next_initial] = final_change
-                        final_change = ''
-                        final_carry = ''
-                    case _: # general linking case
-                        phoneme_list[next_initial] = final_carry
-                        final_carry = ''
-
-            # handling standard cases
-            phoneme_list[final] = final_change + final_carry
-
-        # second round of sound changes
+            key = (decomposed[final], initial_consonant, decomposed[next_initial + 1])
+            rules = self._boundary_rules.get(key)
+            if rules is None:
+                trace = []
+                self._resolve_boundary(*key, trace)
+                rules = self._boundary_rules[key] = tuple(after[0] for before, after in zip(trace, trace[1:]) if before[1:] != after[1:])
+            rule_counts.update(rules)
+
         for syllable in range(len(word)):
-            initial = 4*syllable
             vowel = 4*syllable + 1
+            final = vowel + 1
+            next_initial = final + 2
+            last_syllable = (syllable == len(word) - 1)
+
+            rule = HangulRomanizer._final_rules.get(first_passed[final])
+            if rule == 'final_t' and not last_syllable and first_passed[next_initial] in ('s', 'ss'):
+                rule = 'final_t_before_s'
+            elif rule == 'cluster_rg' and not last_syllable and first_passed[next_initial] == 'g':
+                rule = 'cluster_rg_before_g'
+            elif rule == 'cluster_rb' and second_passed[final] == 'p':
+                rule = 'cluster_rb_special'
+            if rule is not None:
+                rule_counts[rule] += 1
+
+            if not last_syllable and first_passed[next_initial] in ('g', 'd', 'b', 's', 'j') \
+                                 and second_passed[next_initial] not in (first_passed[next_initial], first_passed[next_initial] + 'h'):
+                rule_counts['tensing'] += 1
+
+            if first_passed[vowel] == 'eui':
+                rule_counts['ui_simplification'] += 1
+
+
+    # parsing Hangul and converting to "naive" letter-by-letter romanization
+    # returns a bytearray of four phoneme codes per syllable: initial, vowel, final and a trailing hyphen
+    def _decompose(self, word: str, word_start: bool, word_end: bool):
+        syllable_table = HangulRomanizer._syllable_table or HangulRomanizer._build_syllable_table()
+        phoneme_list = bytearray().join([syllable_table[ord(character) - HangulRomanizer.hangul_blocks] for character in word])
+
+        # positional pronunciations of 의 (word-initial takes precedence over word-final)
+        codes = HangulRomanizer._phoneme_codes
+        if word_end and word[-1] in HangulRomanizer.word_final_vowels:
+            if self.na_neo_ye and word_start and word in ('나의', '너의'):
+                phoneme_list[-3] = codes['ye']
+            else:
+                phoneme_list[-3] = codes[HangulRomanizer.word_final_vowels[word[-1]]]
+        if word_start and word[0] in HangulRomanizer.word_initial_vowels:
+            phoneme_list[1] = codes[HangulRomanizer.word_initial_vowels[word[0]]]
+        return phoneme_list
+
+
+    # first round of sound changes
+    def _first_pass(self, phoneme_list: bytearray, word: str):
+        boundary_table = self._boundary_table
+        count = HangulRomanizer.phoneme_count
+        codes = HangulRomanizer._phoneme_codes
+        empty = codes['']
+        exceptions = self.exceptions.find(word)
+        for syllable in range(len(word) - 1):
             final = 4*syllable + 2
+            next_initial = final + 2
+
+            # compound and Sino-Korean exceptions
+            rules = exceptions.get(syllable)
+            if rules:
+                if rules & ExceptionLexicon.linking and phoneme_list[final] != empty:
+                    phoneme_list[next_initial] = codes['n']
+                if rules & ExceptionLexicon.merging:
+                    phoneme_list[final] = empty
+                    phoneme_list[next_initial] = codes['d']
+                    continue
+                if rules & ExceptionLexicon.tensing:
+                    phoneme_list[next_initial] = codes[HangulRomanizer.tense_consonant(HangulRomanizer.phonemes[phoneme_list[next_initial]])]
+                    continue
+
+            # everything else depends only on the syllable-final consonant and the next syllable's initial and vowel
+            phoneme_list[final], phoneme_list[next_initial] = \
+                boundary_table[(phoneme_list[final]*count + phoneme_list[next_initial])*count + phoneme_list[next_initial + 1]]
+
+
+    # second round of sound changes
+    # syllable-final consonants are resolved with the table compiled from _resolve_final (except for ㄼ, which
+    # also depends on the surrounding vowels) and each syllable's initial and vowel with the table compiled
+    # from _style_syllable, so no configuration option is checked per syllable
+    def _second_pass(self, phoneme_list: bytearray, word: str):
+        final_table = self._final_table
+        style_table = self._style_table
+        count = HangulRomanizer.phoneme_count
+        rb = HangulRomanizer._phoneme_codes['rb']
+        last_initial = 4*(len(word) - 1)
+        for initial in range(0, last_initial, 4):
+            final = initial + 2
             next_initial = initial + 4
-            next_vowel = vowel + 4
+            if phoneme_list[final] == rb:
+                phoneme_list[final], phoneme_list[next_initial] = self._resolve_rb(phoneme_list, initial)
+            else:
+                phoneme_list[final], phoneme_list[next_initial] = final_table[phoneme_list[final]*count + phoneme_list[next_initial]]
+            phoneme_list[initial], phoneme_list[initial + 1] = style_table[phoneme_list[initial]*count + phoneme_list[initial + 1]]
+
+        # last syllable
+        final = last_initial + 2
+        if phoneme_list[final] == rb:
+            phoneme_list[final] = self._resolve_rb(phoneme_list, last_initial, True)[0]
+        else:
+            phoneme_list[final] = self._last_final_table[phoneme_list[final]]
+        phoneme_list[last_initial], phoneme_list[last_initial + 1] = style_table[phoneme_list[last_initial]*count + phoneme_list[last_initial + 1]]
+
+
+    # ㄼ with the syllable starting at phoneme_list[initial], resolved with the reference implementation
+    def _resolve_rb(self, phoneme_list: bytearray, initial: int, last_syllable: bool = False):
+        phonemes = HangulRomanizer.phonemes
+        codes = HangulRomanizer._phoneme_codes
+        if last_syllable:
+            next_initial = next_vowel = None
+        else:
+            next_initial = phonemes[phoneme_list[initial + 4]]
+            next_vowel = phonemes[phoneme_list[initial + 5]]
+        final, next_initial = self._resolve_final('rb', phonemes[phoneme_list[initial]], phonemes[phoneme_list[initial + 1]], next_initial, next_vowel)
+        return codes[final], (None if next_initial is None else codes[next_initial])
+
+
+    # reference implementation of the second round sound changes for a syllable-final consonant, given the syllable's
+    # initial and vowel and the following syllable's initial and vowel (None for the last syllable of a word)
+    # returns the new (final, next_initial) pair
+    def _resolve_final(self, final: str, initial: str, vowel: str, next_initial: str | None = None, next_vowel: str | None = None):
+        # flag that indicates the location of the syllable in the word
+        last_syllable = (next_initial is None)
+
+        # flag that indicates whether or not to tense the following syllable-initial consonant
+        tense_next = False
+
+        # syllable-final consonants
+        match final:
+
+            # ㄱ, ㄲ, ㄳ, ㅋ -> 'k'
+            case 'g' | 'kk' | 'gs' | 'k':
+                final = 'k'
+                tense_next = self.always_tense
+
+            # ㄴ, ㄵ, ㄶ -> 'n'
+            case 'n' | 'nj' | 'nh':
+                tense_next = (final == 'nj')
+                final = 'n'
+
+            # ㄷ, ㅅ, ㅆ, ㅈ, ㅊ, ㅌ, ㅎ -> 't'
+            case 'd' | 's' | 'ss' | 'j' | 'ch' | 't' | 'h':
+                if not last_syllable and next_initial in ('s', 'ss'):
+                    final = ''
+                    tense_next = True
+                else:
+                    final = 't'
+                    tense_next = self.always_tense
 
-            # flags that indicate the location of the syllable in the word
-            first_syllable = (syllable == 0)
-            last_syllable = (syllable == len(word) - 1)
+            # ㄹ -> l
+            case 'r':
+                final = 'l'
+                # ㄹ + ㄹ -> 'l-l'
+                if not last_syllable and next_initial == 'r':
+                    next_initial = 'l'
+
+            # ㄺ
+            case 'rg':
+                # ㄺ + ㄱ -> 'l-kk'
+                if not last_syllable and next_initial == 'g':
+                    final = 'l'
+                    tense_next = True
+                # ㄺ -> 'k'
+                else:
+                    final = 'k'
+
+            # ㄻ, ㅁ -> 'm'
+            case 'rm' | 'm':
+                tense_next = (final == 'rm')
+                final = 'm'
+
+            # ㄼ
+            case 'rb':
+                # special case: 밟 + consonant
+                if initial == 'b' and vowel == 'a':
+                    final = 'p'
+
+                # special case: 넓둥- and 넓죽-
+                elif not last_syllable and initial == 'n' and vowel == 'eo':
+                    if next_initial == 'd' and next_vowel == 'oo':
+                        final = 'p'
+                    elif next_initial == 'j' and next_vowel in ('eo', 'oo'):
+                        final = 'p'
+
+                # flag that indicates if we entered a special case
+                rb_special = (final == 'p')
+
+                # default: ㄼ -> ㄹ
+                if not rb_special:
+                    final = 'l'
+
+                # ㄼ always tenses the next consonant (regardless of if it becomes 'ㅍ' or 'ㄹ')
+                # but self.always_tense decides if we include the in our output for the special 'ㅍ' cases
+                tense_next = self.always_tense or not rb_special
+
+            # ㄽ, ㄾ, ㅀ -> 'l'
+            case 'rs' | 'rt' | 'rh':
+                final = 'l'
+                tense_next = True
+
+            # ㄿ, ㅂ, ㅄ, ㅍ -> 'p'
+            case 'rp' | 'b' | 'bs' | 'p':
+                final = 'p'
+                tense_next = self.always_tense
+
+        # tensing
+        if not last_syllable and tense_next:
+            next_initial = HangulRomanizer.tense_consonant(next_initial)
+
+        return final, next_initial
+
+
+    # reference implementation of the configuration-dependent romanization of a syllable's initial and vowel
+    # returns the new (initial, vowel) pair
+    def _style_syllable(self, initial: str, vowel: str):
+        # different pronuniciations of ㅢ
+        if vowel == 'eui': # common sound change; occurs for everything except word-initial and grammatical 의
+            vowel = 'i'
+        elif vowel == 'q': # deal with placeholder
+            vowel = 'eui'
+
+        # tensed consonants: ㄲ -> 'gg'/'kk', ㄸ -> 'dd'/'tt', ㅃ -> 'bb'/'pp'
+        if self.voiced_double:
+            match initial:
+                case 'kk':
+                    initial = 'gg'
+                case 'tt':
+                    initial = 'dd'
+                case 'pp':
+                    initial = 'bb'
+
+        # 시 -> 'shi'/'si', 샤 -> 'sha'/'sya', etc. (based on configuration)
+        if self.sh and initial in ('s', 'ss'):
+            if vowel in ('i', 'wi'):
+                initial += 'h'
+            elif vowel[0] == 'y':
+                initial += 'h'
+                vowel = vowel[1:]
+
+        # ㅜ -> 'oo'/'u', ㅠ -> 'yoo'/'yu' (based on configuration)
+        if not self.oo and vowel in ('oo', 'yoo'):
+            vowel = vowel[0:-2] + 'u'
+
+        # ㅣ -> 'ee'/'i' (based on configuration)
+        if self.ee and vowel in ('i', 'wi'):
+            vowel = vowel[0:-1] + 'ee'
+
+        # 쟈 -> 'ja'/'jya', 쳐 -> 'cheo'/'chyeo', etc. (based on configuration)
+        if self.no_y and initial in ('j', 'jj', 'ch') and vowel[0] == 'y':
+            vowel = vowel[1:]
+
+        return initial, vowel
+
+
+    # compile _resolve_final into tables over every (final, next_initial) pair that can reach the second round
+    # (and every final of a word's last syllable) and _style_syllable into a table over every (initial, vowel) pair,
+    # once per configuration
+    # tables are indexed by phoneme codes (final*phoneme_count + next_initial and initial*phoneme_count + vowel)
+    # and hold pairs of phoneme codes, or None for pairs that can never occur
+    _second_pass_tables = {}
+
+    def _compile_second_pass_tables(self):
+        key = self._config[2:] # na_neo_ye and ne_ni only matter before the sound changes
+        tables = HangulRomanizer._second_pass_tables.get(key)
+        if tables is None:
+            phonemes = HangulRomanizer.phonemes
+            codes = HangulRomanizer._phoneme_codes
+            count = HangulRomanizer.phoneme_count
+
+            # everything the first round can leave in a final or initial position
+            finals = set(HangulRomanizer.final_consonant_phonetics)
+            initials = set(HangulRomanizer.initial_consonant_phonetics)
+            for resolved_final, resolved_initial in set(self._boundary_table.values()):
+                finals.add(phonemes[resolved_final])
+                initials.add(phonemes[resolved_initial])
+            initials.update([HangulRomanizer.tense_consonant(initial) for initial in initials])
+            initials.add('l')
+            vowels = set(HangulRomanizer.vowel_phonetics) | set(HangulRomanizer.word_initial_vowels.values()) \
+                     | set(HangulRomanizer.word_final_vowels.values())
+
+            # ㄼ also depends on the surrounding vowels, so it is always resolved with _resolve_final
+            finals.discard('rb')
+
+            final_table = [None] * (count * count)
+            last_final_table = [None] * count
+            for final in finals:
+                last_final_table[codes[final]] = codes[self._resolve_final(final, '', '')[0]]
+                for next_initial in initials:
+                    resolved_final, resolved_initial = self._resolve_final(final, '', '', next_initial, '')
+                    final_table[codes[final]*count + codes[next_initial]] = (codes[resolved_final], codes[resolved_initial])
+            style_table = [None] * (count * count)
+            for initial in initials:
+                for vowel in vowels:
+                    styled_initial, styled_vowel = self._style_syllable(initial, vowel)
+                    style_table[codes[initial]*count + codes[vowel]] = (codes[styled_initial], codes[styled_vowel])
+            tables = (tuple(final_table), tuple(last_final_table), tuple(style_table))
+            HangulRomanizer._second_pass_tables[key] = tables
+        return tables
+
+
+    def _lookup_word(self, word: str):
+        if self.cache is None:
+            return self._lookup_stored_word(word)
+
+        key = (self.fingerprint, word) # the fingerprint's hash is cached, unlike that of the configuration tuple
+        romanized = self.cache.get(key)
+        if romanized is None:
+            romanized = self._lookup_stored_word(word)
+            self.cache.put(key, romanized)
+        return romanized
+
+
+    # words missing from the in-memory cache: the lexicon snapshot, then the persistent cache, then the sound changes
+    def _lookup_stored_word(self, word: str):
+        if self.snapshot is not None:
+            romanized = self.snapshot.get(word)
+            if romanized is not None:
+                return romanized
+
+        if self.persistent_cache is None:
+            return self._romanize_word(word)
+
+        romanized = self.persistent_cache.get(self.fingerprint, word)
+        if romanized is None:
+            romanized = self._romanize_word(word)
+            self.persistent_cache.put(self.fingerprint, word, romanized)
+        return romanized
+
+
+    # precompute the romanizations of words under this configuration and write them to a lexicon snapshot at path
+    def build_snapshot(self, path, words):
+        return LexiconSnapshot.build(path, words, self)
+
+
+    def cache_info(self):
+        if self.cache is None:
+            return {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0, 'maxsize': 0}
+        return self.cache.stats()
+
+
+    def cache_clear(self):
+        if self.cache is not None:
+            self.cache.clear()
+
+
+    # NOTE: romanizers constructed without a cache keep it that way, since instances are immutable
+    def cache_resize(self, maxsize: int):
+        if self.cache is None:
+            raise ValueError('this romanizer was constructed without a cache')
+        self.cache.resize(maxsize)
 
-            # flag that indicates whether or not to tense the following syllable-initial consonant
-            tense_next = False
 
-            # syllable-final consonants
-            match phoneme_list[final]:
+    def romanize(self, hangul_string):
+        return self._romanize_string(hangul_string, self._lookup_word)
+
+
+    # romanize every string in an iterable, returning the results in the same order
+    # repeated strings and repeated words are only romanized once across the whole batch
+    # engine = 'numpy' romanizes the batch's distinct words with _romanize_words_vectorized instead of one at a time
+    # (this requires NumPy, and bypasses the word caches and instrumentation)
+    def romanize_many(self, hangul_strings, engine: str = 'python'):
+        if engine == 'numpy':
+            return self._romanize_many_vectorized(hangul_strings)
+        elif engine != 'python':
+            raise ValueError(f'unknown engine {engine!r}')
+
+        romanized_strings = {}
+        romanized_words = {}
+
+        def lookup_word(word):
+            romanized = romanized_words.get(word)
+            if romanized is None:
+                romanized = romanized_words[word] = self._lookup_word(word)
+            return romanized
+
+        batch = RomanizedBatch()
+        for hangul_string in hangul_strings:
+            romanized = romanized_strings.get(hangul_string)
+            if romanized is None:
+                romanized = romanized_strings[hangul_string] = self._romanize_string(hangul_string, lookup_word)
+            batch.append(romanized)
+
+        batch.unique_strings = len(romanized_strings)
+        batch.unique_words = len(romanized_words)
+        return batch
+
+
+    # romanize every string in an iterable on a pool of workers threads (by default, as many as ThreadPoolExecutor
+    # would use), chunk_size strings at a time, returning the results in the same order
+    # the results are always identical to calling romanize() on each string, and on free-threaded builds of Python
+    # the chunks are romanized in parallel
+    def romanize_concurrent(self, hangul_strings, workers: int | None = None, chunk_size: int = 256):
+        from concurrent.futures import ThreadPoolExecutor
+
+        if workers is None:
+            workers = min(32, (os.cpu_count() or 1) + 4)
+        hangul_strings = iter(hangul_strings)
+        chunks = iter(lambda: list(islice(hangul_strings, chunk_size)), [])
+        romanized_strings = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for romanized_chunk in _ordered_map(executor, self._romanize_strings, chunks, 2*workers):
+                romanized_strings += romanized_chunk
+        self.flush()
+        return romanized_strings
+
+
+    def _romanize_strings(self, hangul_strings: list):
+        return [self.romanize(hangul_string) for hangul_string in hangul_strings]
+
+
+    def _romanize_many_vectorized(self, hangul_strings):
+        hangul_strings = list(hangul_strings)
+        unique_strings = dict.fromkeys(hangul_strings)
+
+        # the words _romanize_string will look up (only those with Hangul)
+        words = {}
+        def collect_word(word):
+            words[word] = None
+            return word
+        for hangul_string in unique_strings:
+            self._romanize_string(hangul_string, collect_word)
+
+        romanized_words = self._romanize_words_vectorized(words)
+        for hangul_string in unique_strings:
+            unique_strings[hangul_string] = self._romanize_string(hangul_string, romanized_words.__getitem__)
+
+        batch = RomanizedBatch(map(unique_strings.__getitem__, hangul_strings))
+        batch.unique_strings = len(unique_strings)
+        batch.unique_words = len(romanized_words)
+        return batch
+
+
+    # NumPy counterpart of _romanize_word for many words at once, returning a dictionary from word to romanization
+    # words made up entirely of Hangul are decomposed into arrays of phoneme codes with one element per syllable
+    # and both rounds of sound changes are applied to every syllable boundary at once with the compiled tables
+    # (boundaries are independent of each other, so this gives the same result as the loops in _first_pass and
+    # _second_pass); words that an exception could apply to, words with ㄼ (see _resolve_rb), words that aren't
+    # entirely Hangul and the ne_ni and na_neo_ye special cases go through _romanize_word instead
+    def _romanize_words_vectorized(self, words):
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("engine='numpy' requires NumPy") from None
+
+        romanized_words = {}
+        hangul_words = []
+        for word in words:
+            if not _hangul_run.fullmatch(word) or (self.ne_ni and word in ('네', '네가')) \
+               or (self.na_neo_ye and word in ('나의', '너의')):
+                romanized_words[word] = self._romanize_word(word)
+            else:
+                hangul_words.append(word)
+        if not hangul_words:
+            return romanized_words
+
+        syllable_array, boundary_array, final_array, last_final_array, style_array = self._compile_vectorized_tables(numpy)
+        next_flags, previous_flags, pairs = self._compile_vectorized_exception_filter(numpy)
+        codes = HangulRomanizer._phoneme_codes
+        count = HangulRomanizer.phoneme_count
+        block_count = HangulRomanizer.block_count
+
+        # one element per syllable, words laid out back to back
+        blocks = numpy.frombuffer(''.join(hangul_words).encode('utf-32-le'), dtype='<u4').astype(numpy.intp) \
+                 - HangulRomanizer.hangul_blocks
+        lengths = numpy.fromiter(map(len, hangul_words), dtype=numpy.intp, count=len(hangul_words))
+        ends = numpy.cumsum(lengths)
+        starts = ends - lengths
+        lasts = ends - 1
+        word_of = numpy.repeat(numpy.arange(len(hangul_words)), lengths)
+        initial, vowel, final = syllable_array[blocks].T.copy()
+
+        # positional pronunciations of 의 (word-initial takes precedence over word-final)
+        for character, positional_vowel in HangulRomanizer.word_final_vowels.items():
+            vowel[lasts[blocks[lasts] == ord(character) - HangulRomanizer.hangul_blocks]] = codes[positional_vowel]
+        for character, positional_vowel in HangulRomanizer.word_initial_vowels.items():
+            vowel[starts[blocks[starts] == ord(character) - HangulRomanizer.hangul_blocks]] = codes[positional_vowel]
+
+        # syllables followed by another syllable of the same word
+        inner = numpy.ones(len(blocks), dtype=bool)
+        inner[lasts] = False
+        boundaries = numpy.flatnonzero(inner)
+        after = boundaries + 1
+
+        # words with a boundary that an exception could apply to
+        previous_blocks = blocks[boundaries]
+        next_blocks = blocks[after]
+        candidates = next_flags[next_blocks] | previous_flags[previous_blocks] \
+                     | numpy.isin(previous_blocks*block_count + next_blocks, pairs)
+        fallback = numpy.zeros(len(hangul_words), dtype=bool)
+        fallback[word_of[boundaries[candidates]]] = True
+
+        # first round
+        final[boundaries], initial[after] = boundary_array[final[boundaries], initial[after], vowel[after]].T
+        fallback[word_of[final == codes['rb']]] = True
+
+        # second round
+        final[boundaries], initial[after] = final_array[final[boundaries], initial[after]].T
+        final[lasts] = last_final_array[final[lasts]]
+        initial, vowel = style_array[initial, vowel].T
+
+        # join, building each distinct syllable's string once
+        phonemes = HangulRomanizer.phonemes
+        keys = ((initial.astype(numpy.intp)*count + vowel)*count + final).tolist()
+        syllable_strings = {key: phonemes[key // (count*count)] + phonemes[key // count % count] + phonemes[key % count]
+                            for key in set(keys)}
+        syllables = list(map(syllable_strings.__getitem__, keys))
+        for word, start, end, slow in zip(hangul_words, starts.tolist(), ends.tolist(), fallback.tolist()):
+            romanized_words[word] = self._romanize_word(word) if slow else '-'.join(syllables[start:end])
+        return romanized_words
+
+
+    # dense NumPy versions of the syllable table and the compiled sound change tables (unreachable entries are 0),
+    # shared between instances like the tables they are built from
+    _vectorized_tables = {}
+
+    def _compile_vectorized_tables(self, numpy):
+        key = self._config[2:]
+        tables = HangulRomanizer._vectorized_tables.get(key)
+        if tables is None:
+            count = HangulRomanizer.phoneme_count
+            syllable_table = HangulRomanizer._syllable_table or HangulRomanizer._build_syllable_table()
+            syllable_array = numpy.frombuffer(b''.join(syllable_table), dtype=numpy.uint8).reshape(-1, 4)[:, :3]
+
+            boundary_array = numpy.zeros((count, count, count, 2), dtype=numpy.uint8)
+            boundary_array.reshape(-1, 2)[list(self._boundary_table)] = list(self._boundary_table.values())
+            final_array = numpy.array([resolved or (0, 0) for resolved in self._final_table], dtype=numpy.uint8).reshape(count, count, 2)
+            last_final_array = numpy.array([resolved or 0 for resolved in self._last_final_table], dtype=numpy.uint8)
+            style_array = numpy.array([styled or (0, 0) for styled in self._style_table], dtype=numpy.uint8).reshape(count, count, 2)
+            tables = (syllable_array, boundary_array, final_array, last_final_array, style_array)
+            HangulRomanizer._vectorized_tables[key] = tables
+        return tables
+
+
+    # blocks that can follow or precede an exception's boundary and (previous, next) block pairs that can straddle one,
+    # a necessary condition for any entry of self.exceptions to apply
+    _vectorized_exception_filters = {}
+
+    def _compile_vectorized_exception_filter(self, numpy):
+        exception_filter = HangulRomanizer._vectorized_exception_filters.get(self.exceptions.digest)
+        if exception_filter is None:
+            next_flags = numpy.zeros(HangulRomanizer.block_count, dtype=bool)
+            previous_flags = numpy.zeros(HangulRomanizer.block_count, dtype=bool)
+            pairs = []
+            for pattern, rule in self.exceptions.entries:
+                offset = pattern.index('|')
+                blocks = [ord(character) - HangulRomanizer.hangul_blocks for character in pattern.replace('|', '')]
+                if offset == 0:
+                    next_flags[blocks[0]] = True
+                elif offset == len(blocks):
+                    previous_flags[blocks[-1]] = True
+                else:
+                    pairs.append(blocks[offset - 1]*HangulRomanizer.block_count + blocks[offset])
+            exception_filter = (next_flags, previous_flags, numpy.unique(numpy.array(pairs, dtype=numpy.intp)))
+            HangulRomanizer._vectorized_exception_filters[self.exceptions.digest] = exception_filter
+        return exception_filter
 
-                # ㄱ, ㄲ, ㄳ, ㅋ -> 'k'
-                case 'g' | 'kk' | 'gs' | 'k':
-                    phoneme_list[final] = 'k'
-                    tense_next = self.always_tense
 
-                # ㄴ, ㄵ, ㄶ -> 'n'
-                case 'n' | 'nj' | 'nh':
-                    tense_next = (phoneme_list[final] == 'nj')
-                    phoneme_list[final] = 'n'
+    # words are romanized in a single pass over the string, with everything in between copied through exactly
+    # (words without Hangul romanize to themselves, so they don't need to be looked up)
+    def _romanize_string(self, hangul_string, lookup_word):
+        if self.legacy_whitespace:
+            hangul_string = hangul_string.strip()
 
-                # ㄷ, ㅅ, ㅆ, ㅈ, ㅊ, ㅌ, ㅎ -> 't'
-                case 'd' | 's' | 'ss' | 'j' | 'ch' | 't' | 'h':
-                    if not last_syllable and phoneme_list[next_initial] in ('s', 'ss'):
-                        phoneme_list[final] = ''
-                        tense_next = True
-                    else:
-                        phoneme_list[final] = 't'
-                        tense_next = self.always_tense
-
-                # ㄹ -> l
-                case 'r':
-                    phoneme_list[final] = 'l'
-                    # ㄹ + ㄹ -> 'l-l'
-                    if not last_syllable and phoneme_list[next_initial] == 'r':
-                        phoneme_list[next_initial] = 'l'
-
-                # ㄺ
-                case 'rg':
-                    # ㄺ + ㄱ -> 'l-kk'
-                    if not last_syllable and phoneme_list[next_initial] == 'g':
-                        phoneme_list[final] = 'l'
-                        tense_next = True
-                    # ㄺ -> 'k'
-                    else:
-                        phoneme_list[final] = 'k'
-
-                # ㄻ, ㅁ -> 'm'
-                case 'rm' | 'm':
-                    tense_next = (phoneme_list[final] == 'rm')
-                    phoneme_list[final] = 'm'
-
-                # ㄼ
-                case 'rb':
-                    # special case: 밟 + consonant
-                    if phoneme_list[initial] == 'b' and phoneme_list[vowel] == 'a':
-                        phoneme_list[final] = 'p'
-
-                    # special case: 넓둥- and 넓죽-
-                    elif not last_syllable and phoneme_list[initial] == 'n' and phoneme_list[vowel] == 'eo':
-                        if phoneme_list[next_initial] == 'd' and phoneme_list[next_vowel] == 'oo':
-                            phoneme_list[final] = 'p'
-                        elif phoneme_list[next_initial] == 'j' and phoneme_list[next_vowel] in ('eo', 'oo'):
-                            phoneme_list[final] = 'p'
-
-                    # flag that indicates if we entered a special case
-                    rb_special = (phoneme_list[final] == 'p')
-
-                    # default: ㄼ -> ㄹ
-                    if not rb_special:
-                        phoneme_list[final] = 'l'
-
-                    # ㄼ always tenses the next consonant (regardless of if it becomes 'ㅍ' or 'ㄹ')
-                    # but self.always_tense decides if we include the in our output for the special 'ㅍ' cases
-                    tense_next = self.always_tense or not rb_special
-
-                # ㄽ, ㄾ, ㅀ -> 'l'
-                case 'rs' | 'rt' | 'rh':
-                    phoneme_list[final] = 'l'
-                    tense_next = True
+        # strings without any Hangul come out unchanged
+        if not _hangul_run.search(hangul_string):
+            return hangul_string
 
-                # ㄿ, ㅂ, ㅄ, ㅍ -> 'p'
-                case 'rp' | 'b' | 'bs' | 'p':
-                    phoneme_list[final] = 'p'
-                    tense_next = self.always_tense
+        parts = self._tokenize(hangul_string)
+        parts[::2] = HangulRomanizer._romanize_words(parts[::2], lookup_word, not _not_hangul_or_space.search(hangul_string))
+        return ''.join(parts)
 
-            # tensing
-            if not last_syllable and tense_next:
-                phoneme_list[next_initial] = HangulRomanizer.tense_consonant(phoneme_list[next_initial])
-
-            # patching in non-Korean characters by handling placeholder
-            if phoneme_list[initial] == 'x':
-                phoneme_list[initial] = ''
-                phoneme_list[final] = ''
-                
-                # punctuation at the end of a clause
-                if not first_syllable and phoneme_list[vowel] in ('!', ',', '.', '?'):
-                    phoneme_list[initial - 1] = ''
-
-                # quotation marks
-                if phoneme_list[vowel] in ('\'', '"'):
-                    if not first_syllable:
-                        phoneme_list[initial - 1] = ''
-                    else:
-                        phoneme_list[final + 1] = ''
 
-                # next character is also non-Korean
-                if not last_syllable and phoneme_list[next_initial] == 'x':
-                    phoneme_list[final + 1] = ''
-                
+    # look up the words that contain Hangul with lookup_word, copying everything else (including empty words) through
+    # unchanged, so the caches and batches never hold words like URLs and numbers
+    # only_hangul says that the words come from a string of nothing but Hangul and spaces, so only the empty ones need
+    # to be skipped; otherwise ASCII words are skipped with the much cheaper str.isascii() before searching for Hangul
+    @staticmethod
+    def _romanize_words(words: list, lookup_word, only_hangul: bool):
+        if only_hangul:
+            return [lookup_word(word) if word else word for word in words]
+        search = _hangul_run.search
+        return [word if word.isascii() or not search(word) else lookup_word(word) for word in words]
+
+
+    # split a string into its words and the whitespace between them, as a list with the words at even indices and the
+    # separators at odd indices (so ''.join() of it gives the string back, and the first and last words may be empty)
+    # words are separated by runs of any Unicode whitespace, or with legacy_whitespace by single ASCII spaces
+    # NOTE: the only whitespace character str.isprintable() accepts is the ASCII space, so most strings can be split
+    # with str.split(' ') instead of the much slower _whitespace, at the cost of an empty word between repeated spaces
+    def _tokenize(self, hangul_string):
+        if self.legacy_whitespace or hangul_string.isprintable():
+            words = hangul_string.split(' ')
+            parts = [' '] * (2*len(words) - 1)
+            parts[::2] = words
+            return parts
+        return _whitespace.split(hangul_string)
+
+
+    # romanize a string piece by piece, yielding the output in chunks of about chunk_size characters (more only if a
+    # single run of Hangul is longer), so that it can be written out without ever holding the whole romanization in memory
+    def romanize_chunks(self, hangul_string, chunk_size: int = 1 << 16):
+        if self.legacy_whitespace:
+            yield self.romanize(hangul_string)
+            return
+        yield from self._romanize_blocks((hangul_string[start : start + chunk_size] for start in range(0, len(hangul_string), chunk_size)), \
+                                         chunk_size)
+
+
+    # romanize text given as consecutive blocks (e.g., successive reads from a file), yielding the output block by block
+    # a word at the end of a block may continue in the next one, so it is carried over (in pieces, so that a long word
+    # spanning many blocks is only joined once)
+    # once more than carry_limit characters of one word have been carried, the word is cut between two non-Hangul
+    # characters where possible, which doesn't change its romanization: Hangul runs on either side keep their
+    # position in the word, and a non-Hangul piece at the start of a word is copied through just as it is in the middle
+    # (except for a quotation mark directly before Hangul, which _reversed_cut_point never puts first)
+    # so the carry only grows without bound inside a single unbroken run of Hangul
+    def _romanize_blocks(self, blocks, carry_limit: int):
+        romanize_string = self._romanize_string
+        lookup_word = self._lookup_word
+        carry = []
+        carried = 0
+        for block in blocks:
+            end = len(block) - _leading_word.match(block[::-1]).end()
+            if end > 0:
+                carry.append(block[:end])
+                yield romanize_string(''.join(carry), lookup_word)
+                carry = [block[end:]]
+                carried = len(block) - end
                 continue
 
-            # different pronuniciations of ㅢ
-            if phoneme_list[vowel] == 'eui': # common sound change; occurs for everything except word-initial and grammatical 의
-                phoneme_list[vowel] = 'i'
-            elif phoneme_list[vowel] == 'q': # deal with placeholder
-                phoneme_list[vowel] = 'eui'
-
-            # tensed consonants: ㄲ -> 'gg'/'kk', ㄸ -> 'dd'/'tt', ㅃ -> 'bb'/'pp'
-            if self.voiced_double:
-                match phoneme_list[initial]:
-                    case 'kk':
-                        phoneme_list[initial] = 'gg'
-                    case 'tt':
-                        phoneme_list[initial] = 'dd'
-                    case 'pp':
-                        phoneme_list[initial] = 'bb'
-
-            # 시 -> 'shi'/'si', 샤 -> 'sha'/'sya', etc. (based on configuration)
-            if self.sh and phoneme_list[initial] in ('s', 'ss'):
-                if phoneme_list[vowel] in ('i', 'wi'):
-                    phoneme_list[initial] += 'h'
-                elif phoneme_list[vowel][0] == 'y':
-                    phoneme_list[initial] += 'h'
-                    phoneme_list[vowel] = phoneme_list[vowel][1:]
-
-            # ㅜ -> 'oo'/'u', ㅠ -> 'yoo'/'yu' (based on configuration)
-            if not self.oo and phoneme_list[vowel] in ('oo', 'yoo'):
-                phoneme_list[vowel] = phoneme_list[vowel][0:-2] + 'u'
-
-            # ㅣ -> 'ee'/'i' (based on configuration)
-            if self.ee and phoneme_list[vowel] in ('i', 'wi'):
-                phoneme_list[vowel] = phoneme_list[vowel][0:-1] + 'ee'
-
-            # 쟈 -> 'ja'/'jya', 쳐 -> 'cheo'/'chyeo', etc. (based on configuration)
-            if self.no_y and phoneme_list[initial] in ('j', 'jj', 'ch') and phoneme_list[vowel][0] == 'y':
-                phoneme_list[vowel] = phoneme_list[4*syllable + 1][1:]
-
-        phoneme_list.pop() # trailing hyphen
-        return(''.join(phoneme_list))
+            # the whole block continues the carried word
+            carry.append(block)
+            carried += len(block)
+            if carried > carry_limit:
+                cut_point = _reversed_cut_point.search(block[::-1])
+                if cut_point is not None:
+                    cut = len(block) - 1 - cut_point.start()
+                    carry[-1] = block[:cut]
+                    yield romanize_string(''.join(carry), lookup_word)
+                    carry = [block[cut:]]
+                    carried = len(block) - cut
+        if carried > 0:
+            yield romanize_string(''.join(carry), lookup_word)
+
+
+    # lazily romanize an iterable of lines (e.g., an open file or sys.stdin), yielding one result per line
+    # (without the line terminator, which legacy_whitespace would strip anyway)
+    def romanize_stream(self, hangul_lines):
+        romanize_string = self._romanize_string
+        lookup_word = self._lookup_word
+        for line in hangul_lines:
+            yield romanize_string(line.removesuffix('\n'), lookup_word)
+
+
+    # output for a single line of a file (including its line terminator, if any)
+    def _romanize_line(self, line: str):
+        if self.legacy_whitespace:
+            return self.romanize(line) + '\n'
+        return self.romanize(line)
+
+
+    # asyncio counterpart of romanize() that yields to the event loop after every chunk_size words
+    # strings of at least offload_threshold characters (None = never) are instead romanized on executor
+    # (None = the event loop's default executor), so one large input can't stall the loop
+    async def romanize_async(self, hangul_string, chunk_size: int = 256, offload_threshold: int | None = 1 << 16, executor=None):
+        import asyncio
+
+        if offload_threshold is not None and len(hangul_string) >= offload_threshold:
+            return await asyncio.get_running_loop().run_in_executor(executor, self.romanize, hangul_string)
+
+        if self.legacy_whitespace:
+            hangul_string = hangul_string.strip()
+        if not _hangul_run.search(hangul_string):
+            return hangul_string
+
+        # the same words as _romanize_string, looked up chunk_size at a time
+        parts = self._tokenize(hangul_string)
+        only_hangul = not _not_hangul_or_space.search(hangul_string)
+        for start in range(0, len(parts), 2*chunk_size):
+            chunk = slice(start, start + 2*chunk_size, 2)
+            parts[chunk] = HangulRomanizer._romanize_words(parts[chunk], self._lookup_word, only_hangul)
+            await asyncio.sleep(0)
+        return ''.join(parts)
+
+
+    # asyncio counterpart of romanize_stream() for an iterable or asynchronous iterable of lines, yielding to the event
+    # loop after every chunk_size lines (lines of at least offload_threshold characters are romanized on executor)
+    async def romanize_stream_async(self, hangul_lines, chunk_size: int = 256, offload_threshold: int | None = 1 << 16, executor=None):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        if not hasattr(hangul_lines, '__aiter__'):
+            hangul_lines = _aiter(hangul_lines)
+        since_yield = 0
+        async for line in hangul_lines:
+            line = line.removesuffix('\n')
+            if offload_threshold is not None and len(line) >= offload_threshold:
+                yield await loop.run_in_executor(executor, self.romanize, line)
+                since_yield = 0
+                continue
+            yield self.romanize(line)
+            since_yield += 1
+            if since_yield >= chunk_size:
+                await asyncio.sleep(0)
+                since_yield = 0
+
+
+    # asyncio counterpart of romanize_file(), which runs on executor (None = the event loop's default executor)
+    # since reading and writing files blocks; keyword arguments are passed on to romanize_file()
+    async def romanize_file_async(self, hangul_in, romanized_out, executor=None, **kwargs):
+        import asyncio
+
+        await asyncio.get_running_loop().run_in_executor(executor, partial(self.romanize_file, hangul_in, romanized_out, **kwargs))
+
+
+    # hangul_in and romanized_out can each be a path or an open text file (e.g., sys.stdin and sys.stdout)
+    # the input is read buffer_size characters at a time, so even a single huge line never has to fit in memory, and
+    # its whitespace (including line terminators) is copied through exactly
+    # with legacy_whitespace, every line is stripped and ends with a newline in the output instead, and output is
+    # written batch_size lines at a time; paths are opened with buffers of buffer_size bytes
+    # with workers > 1, chunks of chunk_size lines are romanized in a pool of worker processes instead
+    # NOTE: the output is byte-identical either way, since each worker romanizes its lines with an identically
+    # configured HangulRomanizer and chunks are written back in their original order
+    # with resume = True (paths only), the input is memory-mapped and processed in line-aligned ranges of about
+    # checkpoint_bytes bytes, and progress is checkpointed so that an interrupted run picks up where it left off
+    # with incremental = True (romanized_out must be a path), a manifest of line hashes is kept next to the output,
+    # and re-runs only romanize lines that are new or changed (see _romanize_file_incremental)
+    def romanize_file(self, hangul_in, romanized_out, batch_size: int = 1024, buffer_size: int = 1 << 20, \
+                      workers: int = 1, chunk_size: int = 4096, resume: bool = False, checkpoint_bytes: int = 1 << 22, \
+                      incremental: bool = False):
+        if incremental:
+            self._romanize_file_incremental(hangul_in, romanized_out, buffer_size)
+            return
+        if resume:
+            self._romanize_file_resumable(hangul_in, romanized_out, workers, checkpoint_bytes)
+            return
+
+        with _open_text(hangul_in, 'r', buffer_size) as reader, \
+             _open_text(romanized_out, 'w', buffer_size) as writer:
+            if workers > 1:
+                self._romanize_file_parallel(reader, writer, workers, chunk_size)
+                return
+
+            if not self.legacy_whitespace:
+                for romanized_block in self._romanize_blocks(iter(lambda: reader.read(buffer_size), ''), buffer_size):
+                    writer.write(romanized_block)
+            else:
+                batch = []
+                for romanized_line in self.romanize_stream(reader):
+                    batch.append(romanized_line)
+                    batch.append('\n')
+                    if len(batch) >= 2*batch_size:
+                        writer.writelines(batch)
+                        batch.clear()
+                writer.writelines(batch)
+        self.flush()
+
+
+    # the hits, misses and evictions of the workers' word caches are added up in cache_stats, if given (see main())
+    def _romanize_file_parallel(self, reader, writer, workers: int, chunk_size: int, cache_stats: Counter | None = None):
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunks = iter(lambda: list(islice(reader, chunk_size)), [])
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self._options(),)) as executor:
+            for romanized_chunk, chunk_cache_stats in _ordered_map(executor, _romanize_chunk, chunks, 2*workers):
+                writer.write(romanized_chunk)
+                if cache_stats is not None:
+                    cache_stats.update(chunk_cache_stats)
+
+
+    def _romanize_file_resumable(self, hangul_in, romanized_out, workers: int, checkpoint_bytes: int):
+        import json
+        from concurrent.futures import ProcessPoolExecutor
+
+        if not isinstance(hangul_in, (str, os.PathLike)) or not isinstance(romanized_out, (str, os.PathLike)):
+            raise TypeError('resumable romanization requires file paths')
+
+        offsets = _line_index(hangul_in, checkpoint_bytes)
+        input_stat = os.stat(hangul_in)
+        # the romanizer's fingerprint covers its configuration, the rule set and the exceptions, so a run is never
+        # resumed with different rules (e.g., after upgrading this module) and the checkpoint stays serializable
+        fingerprint = [input_stat.st_size, input_stat.st_mtime_ns, self.fingerprint, self.legacy_whitespace]
+
+        # pick up from the last completed range if the checkpoint belongs to this input and configuration
+        checkpoint_path = os.fspath(romanized_out) + '.ckpt'
+        input_offset = output_offset = 0
+        try:
+            with open(checkpoint_path, 'r', encoding='utf8') as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+            if checkpoint['fingerprint'] == fingerprint and os.path.getsize(romanized_out) >= checkpoint['output_offset']:
+                input_offset = checkpoint['input_offset']
+                output_offset = checkpoint['output_offset']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        # the checkpointed offset is the end of a line, but not necessarily one of offsets (the index may have been built
+        # with a different checkpoint_bytes since), so the first remaining range starts exactly there
+        ends = [end for end in offsets[1:] if end > input_offset]
+        ranges = list(zip([input_offset] + ends[:-1], ends))
+        if output_offset > 0:
+            os.truncate(romanized_out, output_offset)
+
+        with open(romanized_out, 'a' if output_offset > 0 else 'w', encoding='utf8') as writer:
+            if workers > 1:
+                executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self._options(),))
+                range_args = ((hangul_in, start, end) for start, end in ranges)
+                romanized_chunks = _ordered_map(executor, _romanize_byte_range, range_args, 2*workers)
+            else:
+                executor = nullcontext()
+                romanized_chunks = self._romanize_mapped_ranges(hangul_in, ranges)
+
+            with executor:
+                for (start, end), romanized_chunk in zip(ranges, romanized_chunks):
+                    writer.write(romanized_chunk)
+                    writer.flush()
+                    os.fsync(writer.fileno())
+                    _write_json_atomic(checkpoint_path, {
+                        'fingerprint': fingerprint,
+                        'input_offset': end,
+                        'output_offset': writer.tell()
+                    })
+
+        self.flush()
+        try:
+            os.remove(checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+
+    # <romanized_out>.manifest records a hash of every input line and the length of its output, for the fingerprint
+    # and the legacy_whitespace setting of the romanizer that wrote it (both change each line's output); on a re-run,
+    # the output of the longest unchanged run of leading lines is kept, the rest of the old output is reused for lines
+    # whose hash it has (even if they moved), and only lines that are new or changed are romanized
+    # lines that were only appended are written after the old output in place; otherwise the new output is written to
+    # <romanized_out>.tmp, copying reused lines from the old output by offset, and then replaces it
+    def _romanize_file_incremental(self, hangul_in, romanized_out, buffer_size: int):
+        if not isinstance(romanized_out, (str, os.PathLike)):
+            raise TypeError('incremental romanization requires an output path')
+        manifest_path = os.fspath(romanized_out) + '.manifest'
+        temp_path = os.fspath(romanized_out) + '.tmp'
+        manifest_key = hashlib.sha256(repr((self.fingerprint, self.legacy_whitespace)).encode()).hexdigest()
+        old_digests, old_lengths = _read_manifest(manifest_path, manifest_key, romanized_out)
+
+        digests = bytearray()
+        lengths = array('Q')
+        kept_bytes = 0 # size of the output of the unchanged leading lines
+        writer = old_output = None
+        try:
+            with _open_text(hangul_in, 'r', buffer_size) as reader:
+                for index, line in enumerate(reader):
+                    digest = hashlib.blake2b(line.encode('utf8'), digest_size=16).digest()
+                    digests += digest
+                    if writer is None:
+                        if index < len(old_lengths) and old_digests[16*index : 16*(index + 1)] == digest:
+                            lengths.append(old_lengths[index])
+                            kept_bytes += old_lengths[index]
+                            continue
+                        # first changed line: everything from here on is written again
+                        if os.path.exists(manifest_path): # the output no longer matches it
+                            os.remove(manifest_path)
+                        reusable = _reusable_spans(kept_bytes, old_digests, old_lengths, index)
+                        if reusable:
+                            old_output = open(romanized_out, 'rb', buffering=buffer_size)
+                            writer = open(temp_path, 'wb', buffering=buffer_size)
+                            for start in range(0, kept_bytes, buffer_size):
+                                writer.write(old_output.read(min(buffer_size, kept_bytes - start)))
+                        else:
+                            writer = open(romanized_out, 'r+b' if os.path.exists(romanized_out) else 'wb', buffering=buffer_size)
+                            writer.seek(kept_bytes)
+                            writer.truncate()
+
+                    span = reusable.get(digest)
+                    if span is None:
+                        romanized = self._romanize_line(line).encode('utf8')
+                    else:
+                        old_output.seek(span[0])
+                        romanized = old_output.read(span[1] - span[0])
+                    writer.write(romanized)
+                    lengths.append(len(romanized))
+        finally:
+            if writer is not None:
+                writer.close()
+            if old_output is not None:
+                old_output.close()
+        if old_output is not None:
+            os.replace(temp_path, romanized_out)
+
+        # no line changed, but lines may have been removed from the end
+        if writer is None and (not os.path.exists(romanized_out) or os.path.getsize(romanized_out) != kept_bytes):
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
+            with open(romanized_out, 'ab') as output_file:
+                output_file.truncate(kept_bytes)
+
+        self.flush()
+        with open(manifest_path + '.tmp', 'wb') as manifest_file:
+            manifest_file.write(_manifest_header.pack(_manifest_magic, bytes.fromhex(manifest_key), len(lengths)))
+            manifest_file.write(digests)
+            manifest_file.write(lengths.tobytes())
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+
+    def _romanize_mapped_ranges(self, hangul_in, ranges):
+        if not ranges:
+            return
+        with open(hangul_in, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start, end in ranges:
+                yield self._romanize_lines(io.StringIO(mapped[start:end].decode('utf8'), newline=None))
+
+
+    # romanize lines into a single block of output text, one line per input line
+    def _romanize_lines(self, lines):
+        return ''.join(map(self._romanize_line, lines))
+
+
+    # keyword arguments that reconstruct an identically configured (but independent) HangulRomanizer
+    def _options(self):
+        options = dict(zip(HangulRomanizer._option_names, self._config))
+        options['cache_size'] = 0 if self.cache is None else self.cache.maxsize
+        if self.persistent_cache is not None:
+            options['persistent_cache'] = self.persistent_cache.path
+        if self.snapshot is not None:
+            options['snapshot'] = self.snapshot.path
+        if self.exceptions is not ExceptionLexicon.default():
+            options['exceptions'] = self.exceptions
+        if self.legacy_whitespace:
+            options['legacy_whitespace'] = True
+        return options
+
+
+    # write out anything buffered for the persistent cache
+    def flush(self):
+        if self.persistent_cache is not None:
+            self.persistent_cache.flush()
+
+
+# a text and its romanization, kept in sync under edits (e.g., in an editor that re-romanizes on every keystroke)
+# romanized is always equal to hangul_romanizer.romanize(text), but since sound changes never cross word boundaries,
+# edit() only romanizes the words that an edit touches and reuses the rest
+class IncrementalDocument:
+
+    def __init__(self, hangul_romanizer: HangulRomanizer, text: str = ''):
+        self.hangul_romanizer = hangul_romanizer
+        self._legacy_whitespace = hangul_romanizer.legacy_whitespace
+        self._words = []
+        self._romanized_words = []
+        self._rebuild(text)
+
+    # (starts, words) of the words of text, a part of the document starting at offset
+    def _split(self, text: str, offset: int):
+        starts = []
+        words = []
+        # the words of _tokenize, without the empty ones unless legacy_whitespace keeps them
+        for index, part in enumerate(self.hangul_romanizer._tokenize(text)):
+            if index % 2 == 0 and (part or self._legacy_whitespace):
+                starts.append(offset)
+                words.append(part)
+            offset += len(part)
+        return starts, words
+
+    # words without Hangul romanize to themselves
+    def _romanize_word(self, word: str):
+        return self.hangul_romanizer._lookup_word(word) if _hangul_run.search(word) else word
+
+    # romanize text from scratch, reusing the romanizations of words that were already in the document
+    def _rebuild(self, text: str):
+        previous = dict(zip(self._words, self._romanized_words))
+        if self._legacy_whitespace:
+            stripped = text.strip()
+            self._start = len(text) - len(text.lstrip()) # romanize() ignores leading and trailing whitespace
+            self._end = self._start + len(stripped)
+            self._starts, self._words = self._split(stripped, self._start) if stripped else ([], [])
+        else:
+            self._starts, self._words = self._split(text, 0)
+        self._romanized_words = [previous[word] if word in previous else self._romanize_word(word) for word in self._words]
+        self._set_text(text)
+
+    def _set_text(self, text: str):
+        self.text = text
+        if self._legacy_whitespace:
+            self.romanized = ' '.join(self._romanized_words)
+        else:
+            pieces = []
+            position = 0
+            for start, word, romanized_word in zip(self._starts, self._words, self._romanized_words):
+                pieces.append(text[position:start])
+                pieces.append(romanized_word)
+                position = start + len(word)
+            pieces.append(text[position:])
+            self.romanized = ''.join(pieces)
+        self._spans = None
+
+    # replace text[start:end] with replacement, returning the new romanization and spans
+    def edit(self, start: int, end: int, replacement: str):
+        if not 0 <= start <= end <= len(self.text):
+            raise ValueError(f'invalid edit range {start}:{end} of a text of length {len(self.text)}')
+        text = self.text[:start] + replacement + self.text[end:]
+
+        # with legacy_whitespace, edits that could change the leading or trailing whitespace are rare enough to
+        # simply rebuild
+        if self._legacy_whitespace and not (self._start < start and end < self._end):
+            self._rebuild(text)
+            return self.romanized, self.spans
+
+        # words from the first one ending at or after start to the last one starting at or before end (none if the
+        # edit only touches whitespace); the edit can't reach past them, so the text from the start of the edit or of
+        # those words to their end is split and romanized again
+        starts, words = self._starts, self._words
+        first = bisect_left(range(len(words)), start, key=lambda index: starts[index] + len(words[index]))
+        last = bisect_right(starts, end) - 1
+        delta = len(replacement) - (end - start)
+        region_start = min(start, starts[first]) if first <= last else start
+        region_end = max(end, starts[last] + len(words[last])) if first <= last else end
+        edited_starts, edited_words = self._split(text[region_start : region_end + delta], region_start)
+
+        words[first : last + 1] = edited_words
+        self._romanized_words[first : last + 1] = [self._romanize_word(word) for word in edited_words]
+        starts[first:] = edited_starts + [position + delta for position in starts[last + 1:]]
+        if self._legacy_whitespace:
+            self._end += delta
+        self._set_text(text)
+        return self.romanized, self.spans
+
+    # (source_start, source_end, romanized_start, romanized_end) of every word
+    @property
+    def spans(self):
+        if self._spans is None:
+            spans = []
+            source_end = romanized_end = 0
+            for start, word, romanized_word in zip(self._starts, self._words, self._romanized_words):
+                # the whitespace between words is copied through, or replaced by a single space with legacy_whitespace
+                if self._legacy_whitespace:
+                    romanized_start = romanized_end + 1 if spans else 0
+                else:
+                    romanized_start = romanized_end + start - source_end
+                source_end = start + len(word)
+                romanized_end = romanized_start + len(romanized_word)
+                spans.append((start, source_end, romanized_start, romanized_end))
+            self._spans = spans
+        return self._spans
+
+    # offset in romanized corresponding to an offset in text
+    # offsets at the start or end of a word map exactly, offsets inside a word are interpolated
+    def to_romanized(self, offset: int):
+        return self._map_offset(offset, 0, len(self.romanized))
+
+    # offset in text corresponding to an offset in romanized
+    def to_source(self, offset: int):
+        return self._map_offset(offset, 2, len(self.text))
+
+    def _map_offset(self, offset: int, side: int, other_length: int):
+        spans = self.spans
+        index = bisect_right(spans, offset, key=lambda span: span[side]) - 1
+        if index < 0: # leading whitespace
+            return min(offset, spans[0][2 - side] if spans else other_length)
+        span = spans[index]
+        start, end = span[side], span[side + 1]
+        other_start, other_end = span[2 - side], span[3 - side]
+        if offset < end:
+            return other_start + (offset - start) * (other_end - other_start) // (end - start)
+        # whitespace after the word
+        return min(other_end + offset - end, spans[index + 1][2 - side] if index + 1 < len(spans) else other_length)
+
+
+# per-process romanizer used by the workers of HangulRomanizer.romanize_file(workers=N), and the statistics of its
+# word cache as of the last chunk
+_worker_romanizer = None
+_worker_cache_stats = None
+
+def _init_worker(options: dict):
+    global _worker_romanizer, _worker_cache_stats
+    _worker_romanizer = HangulRomanizer(**options)
+    _worker_cache_stats = Counter()
+
+# the romanized chunk, and the hits, misses and evictions of the worker's word cache while romanizing it
+def _romanize_chunk(lines: list):
+    romanized_chunk = _worker_romanizer._romanize_lines(lines)
+    _worker_romanizer.flush() # worker processes exit without running atexit handlers
+    info = _worker_romanizer.cache_info()
+    chunk_cache_stats = {name: info[name] - _worker_cache_stats[name] for name in ('hits', 'misses', 'evictions')}
+    _worker_cache_stats.update(chunk_cache_stats)
+    return romanized_chunk, chunk_cache_stats
+
+def _romanize_byte_range(path, start: int, end: int):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode('utf8')
+    romanized_chunk = _worker_romanizer._romanize_lines(io.StringIO(text, newline=None))
+    _worker_romanizer.flush()
+    return romanized_chunk
+
+
+# asynchronous iterator over an ordinary iterable
+async def _aiter(iterable):
+    for item in iterable:
+        yield item
+
+
+# submit fn(*args) for every item of args_iter while keeping at most window tasks in flight,
+# yielding the results in submission order
+def _ordered_map(executor, fn, args_iter, window: int):
+    pending = deque()
+    for args in args_iter:
+        if not isinstance(args, tuple):
+            args = (args,)
+        pending.append(executor.submit(fn, *args))
+        if len(pending) > window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# line-aligned byte offsets splitting a file into ranges of about stride bytes (starting with 0 and ending with
+# the file size), persisted next to the file as <path>.idx and reused for as long as the file is unchanged
+_line_index_header = struct.Struct('<8sQQQ')
+_line_index_magic = b'KRLNIDX1'
+
+def _line_index(path, stride: int):
+    input_stat = os.stat(path)
+    header = (_line_index_magic, input_stat.st_size, input_stat.st_mtime_ns, stride)
+    index_path = os.fspath(path) + '.idx'
+
+    try:
+        with open(index_path, 'rb') as index_file:
+            if _line_index_header.unpack(index_file.read(_line_index_header.size)) == header:
+                offsets = array('Q')
+                offsets.frombytes(index_file.read())
+                return offsets
+    except (OSError, struct.error):
+        pass
+
+    size = input_stat.st_size
+    offsets = array('Q', [0])
+    if size > 0:
+        with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            position = 0
+            while position < size:
+                newline = mapped.find(b'\n', position + max(stride, 1) - 1)
+                position = size if newline < 0 else newline + 1
+                offsets.append(position)
+
+    # the index is only an optimization, so failing to persist it (e.g., in a read-only directory) is fine
+    try:
+        with open(index_path + '.tmp', 'wb') as index_file:
+            index_file.write(_line_index_header.pack(*header))
+            index_file.write(offsets.tobytes())
+        os.replace(index_path + '.tmp', index_path)
+    except OSError:
+        pass
+    return offsets
+
+
+# line hashes and output lengths stored by HangulRomanizer._romanize_file_incremental
+_manifest_header = struct.Struct('<8s32sQ')
+_manifest_magic = b'KRMANIF1'
+
+# (digests, lengths) from a manifest written with the key fingerprint for an output file that is still intact
+# (a missing, foreign or inconsistent manifest is treated as empty)
+def _read_manifest(manifest_path: str, fingerprint: str, output_path):
+    try:
+        with open(manifest_path, 'rb') as manifest_file:
+            magic, manifest_fingerprint, count = _manifest_header.unpack(manifest_file.read(_manifest_header.size))
+            digests = manifest_file.read(16*count)
+            lengths = array('Q')
+            lengths.frombytes(manifest_file.read(8*count))
+        if magic == _manifest_magic and manifest_fingerprint.hex() == fingerprint and len(digests) == 16*count \
+           and len(lengths) == count and os.path.getsize(output_path) == sum(lengths):
+            return digests, lengths
+    except (OSError, struct.error, ValueError):
+        pass
+    return b'', array('Q')
+
+# the (start, end) offsets in the old output of each line from first_line on, by hash (empty if there are none)
+def _reusable_spans(kept_bytes: int, digests: bytes, lengths: array, first_line: int):
+    reusable = {}
+    position = kept_bytes
+    for index in range(first_line, len(lengths)):
+        reusable.setdefault(digests[16*index : 16*(index + 1)], (position, position + lengths[index]))
+        position += lengths[index]
+    return reusable
+
+
+def _write_json_atomic(path: str, data):
+    import json
+
+    with open(path + '.tmp', 'w', encoding='utf8') as file:
+        json.dump(data, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(path + '.tmp', path)
+
+
+# open a path as a UTF-8 text file, or pass through an already open file without closing it afterwards
+def _open_text(file, mode: str, buffer_size: int):
+    if isinstance(file, (str, bytes, os.PathLike)):
+        return open(file, mode, buffering=buffer_size, encoding='utf8')
+    return nullcontext(file)
+
+
+# counts the lines written through it, for main(--stats)
+class _LineCountingWriter:
+
+    def __init__(self, file):
+        self.file = file
+        self.lines = 0
+        self.partial = False # whether the last line written so far is unterminated
+
+    def write(self, text: str):
+        if text:
+            self.lines += text.count('\n')
+            self.partial = not text.endswith('\n')
+        return self.file.write(text)
+
+    def writelines(self, texts):
+        for text in texts:
+            self.write(text)
+
+    def line_count(self):
+        return self.lines + self.partial
+
+
+# command-line entry point (python -m korean_romanization, or python korean_romanization.py), which romanizes a file
+# or stdin and writes the result to a file or stdout, copying everything but Hangul words through byte for byte
+# both ends are opened with buffers of --buffer-size bytes and read and written in blocks, so arbitrarily large inputs
+# are streamed; every constructor option that can be given on the command line has a flag (booleans also have a
+# --no- form), and options that aren't given keep the constructor's defaults
+# NOTE: modules that only some code paths need (argparse, sqlite3, concurrent.futures, json, asyncio) are imported
+# where they are used, so that starting up once per small file in a shell loop stays cheap
+def main(argv: list | None = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m korean_romanization',
+                                     description='Phonetically romanize the Hangul text in a file or standard input.')
+    parser.add_argument('input', nargs='?', default='-', help='file to romanize (default: standard input)')
+    parser.add_argument('-o', '--output', default='-', help='file to write to (default: standard output)')
+
+    preferences = parser.add_argument_group('romanization options')
+    boolean_flags = (
+        ('na_neo_ye', "romanize 나의 and 너의 as 'na-ye' and 'neo-ye'"),
+        ('ne_ni', "romanize 네 as 'ni' and 네가 as 'ni-ga' (on by default)"),
+        ('show_hada_h', "always show 'h' for 하다 and its conjugations (on by default)"),
+        ('voiced_double', "romanize ㄲ, ㄸ, ㅃ as 'gg', 'dd', 'bb'"),
+        ('sh', "romanize ㅅ as 'sh' before ㅣ, ㅑ, etc. (on by default)"),
+        ('oo', "romanize ㅜ as 'oo'"),
+        ('ee', "romanize ㅣ as 'ee'"),
+        ('always_tense', 'always show the tensing of initial consonants after final obstruents'),
+        ('no_y', "drop the 'y' of ㅑ, ㅕ, ㅛ, ㅠ after ㅈ, ㅉ, ㅊ"),
+        ('legacy_whitespace', 'strip each line and only split words at ASCII spaces, like earlier versions'),
+    )
+    for name, help in boolean_flags:
+        preferences.add_argument('--' + name.replace('_', '-'), action=argparse.BooleanOptionalAction, help=help)
+    preferences.add_argument('--show-h', type=int, choices=(0, 1, 2),
+                             help="how to show ㅎ linking without aspiration: 0 = not at all (default), 1 = 'ʰ', 2 = 'h'")
+    preferences.add_argument('--exceptions', metavar='PATH', help='file of additional compound exceptions')
+
+    caching = parser.add_argument_group('caching')
+    caching.add_argument('--cache-size', type=int, metavar='WORDS', help='size of the in-memory word cache (0 = none)')
+    caching.add_argument('--persistent-cache', metavar='PATH', help='SQLite database to keep romanized words in across runs')
+    caching.add_argument('--snapshot', metavar='PATH', help='lexicon snapshot of precomputed romanizations')
+
+    processing = parser.add_argument_group('processing')
+    processing.add_argument('-j', '--jobs', type=int, default=1,
+                            help='number of worker processes (default: 1, 0 = one per CPU)')
+    processing.add_argument('--chunk-size', type=int, default=4096, metavar='LINES',
+                            help='lines sent to a worker process at a time (default: 4096)')
+    processing.add_argument('--buffer-size', type=int, default=1 << 20, metavar='BYTES',
+                            help='size of the input and output buffers (default: 1 MiB)')
+    processing.add_argument('--stats', action='store_true',
+                            help='report the throughput and cache behavior on standard error at exit')
+
+    args = parser.parse_args(argv)
+    if args.jobs < 0 or args.chunk_size < 1 or args.buffer_size < 1:
+        parser.error('--jobs must not be negative, and --chunk-size and --buffer-size must be positive')
+    jobs = args.jobs or os.cpu_count() or 1
+
+    option_names = [name for name, _ in boolean_flags] + ['show_h', 'exceptions', 'cache_size', 'persistent_cache', 'snapshot']
+    options = {name: getattr(args, name) for name in option_names if getattr(args, name) is not None}
+
+    started = time.perf_counter()
+    try:
+        hangul_romanizer = HangulRomanizer(**options)
+
+        # newline='' keeps line terminators exactly as they are, and closefd=False leaves stdin and stdout open
+        if args.input == '-':
+            reader = open(sys.stdin.fileno(), 'r', buffering=args.buffer_size, encoding='utf8', newline='', closefd=False)
+        else:
+            reader = open(args.input, 'r', buffering=args.buffer_size, encoding='utf8', newline='')
+        with reader:
+            if args.output == '-':
+                sys.stdout.flush()
+                writer = open(sys.stdout.fileno(), 'w', buffering=args.buffer_size, encoding='utf8', newline='', closefd=False)
+            else:
+                writer = open(args.output, 'w', buffering=args.buffer_size, encoding='utf8', newline='')
+            with writer:
+                output = _LineCountingWriter(writer) if args.stats else writer
+                if jobs > 1:
+                    # each worker process has its own word cache, whose statistics are added up here
+                    cache_stats = Counter()
+                    hangul_romanizer._romanize_file_parallel(reader, output, jobs, args.chunk_size, cache_stats)
+                else:
+                    hangul_romanizer.romanize_file(reader, output, buffer_size=args.buffer_size)
+    except BrokenPipeError:
+        # whatever was reading the output went away (e.g., | head), which isn't an error for a filter; stdout is
+        # pointed at /dev/null so that flushing it at exit doesn't fail again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError) as error:
+        parser.exit(1, f'{parser.prog}: error: {error}\n')
+
+    if args.stats:
+        seconds = time.perf_counter() - started
+        lines = output.line_count()
+        print(f'{lines} lines in {seconds:.3f} s ({lines / seconds if seconds > 0 else 0:.0f} lines/s)', file=sys.stderr)
+        if hangul_romanizer.cache is None:
+            print('cache: disabled', file=sys.stderr)
+        else:
+            info = cache_stats if jobs > 1 else hangul_romanizer.cache_info()
+            lookups = info['hits'] + info['misses']
+            summary = f"cache: {info['hits']} hits, {info['misses']} misses ({info['hits'] / lookups if lookups else 0:.1%} hit rate), " \
+                      f"{info['evictions']} evictions"
+            if jobs > 1:
+                summary += f" in {jobs} worker processes of {hangul_romanizer.cache.maxsize} words each"
+            else:
+                summary += f", {info['size']}/{info['maxsize']} words"
+            print(summary, file=sys.stderr)
+    return 0
 
 
-    def romanize(self, hangul_string):
-        hangul_string = hangul_string.strip()
-        if len(hangul_string) == 0:
-            return ''
-        
-        word_list = []
-        hangul_words = hangul_string.split(' ')
-        
-        for word in hangul_words:
-            word_list.append(self._romanize_word(word))
-            
-        romanized_string = ' '.join(word_list)
-        return romanized_string
-
-
-    def romanize_file(self, hangul_in, romanized_out):
-        with open(hangul_in, 'r', encoding='utf8') as reader, \
-             open(romanized_out, 'w', encoding='utf8') as writer:
-            for line in reader:
-                writer.write(self.romanize(line) + '\n')
+if __name__ == '__main__':
+    sys.exit(main())
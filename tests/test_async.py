@@ -0,0 +1,66 @@
+import os
+import sys
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import asyncio
+
+import pytest
+
+from korean_romanization import HangulRomanizer
+
+class TestRomanizeAsync:
+    hangul_romanizer = HangulRomanizer()
+
+    def test_matches_romanize(self):
+        strings = ["  신라 국물 같이 좋다 꽃잎 맛없다 없어 ", "", "hello", "'안녕'하세요! K팝 2020년 \"나의\"",
+                   "\t신라\u3000국물\n\n같이 "]
+        for string in strings:
+            expected = self.hangul_romanizer.romanize(string)
+            assert asyncio.run(self.hangul_romanizer.romanize_async(string, chunk_size=2)) == expected
+            assert asyncio.run(self.hangul_romanizer.romanize_async(string, offload_threshold=0)) == expected
+
+    def test_yields_to_event_loop(self):
+        long_string = ' '.join(["신라", "국물", "같이", "좋다"] * 500)
+
+        async def main():
+            ticks = 0
+            done = False
+
+            async def ticker():
+                nonlocal ticks
+                while not done:
+                    ticks += 1
+                    await asyncio.sleep(0)
+
+            task = asyncio.create_task(ticker())
+            romanized = await self.hangul_romanizer.romanize_async(long_string, chunk_size=100, offload_threshold=None)
+            done = True
+            await task
+            return romanized, ticks
+
+        romanized, ticks = asyncio.run(main())
+        assert romanized == self.hangul_romanizer.romanize(long_string)
+        assert ticks >= 10
+
+    def test_stream(self):
+        lines = ["가 나\n", "\n", "잘 먹겠습니다\n", "x" * 50 + " 꽃잎"]
+
+        async def collect(hangul_lines):
+            return [line async for line in self.hangul_romanizer.romanize_stream_async(hangul_lines, chunk_size=1, offload_threshold=40)]
+
+        async def async_lines():
+            for line in lines:
+                yield line
+
+        expected = list(self.hangul_romanizer.romanize_stream(lines))
+        assert asyncio.run(collect(lines)) == expected
+        assert asyncio.run(collect(async_lines())) == expected
+
+    def test_file(self, tmp_path):
+        hangul_in = tmp_path / "hangul.txt"
+        hangul_in.write_text("가 나 다\n잘 먹겠습니다\n" * 10, encoding='utf8')
+        asyncio.run(self.hangul_romanizer.romanize_file_async(hangul_in, tmp_path / "async.txt", batch_size=3))
+        self.hangul_romanizer.romanize_file(hangul_in, tmp_path / "sync.txt")
+        assert (tmp_path / "async.txt").read_bytes() == (tmp_path / "sync.txt").read_bytes()
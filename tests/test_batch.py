@@ -0,0 +1,45 @@
+import os
+import sys
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import pytest
+
+from korean_romanization import HangulRomanizer
+
+class TestRomanizeMany:
+    hangul_romanizer = HangulRomanizer(cache_size=0)
+
+    def test_order_and_deduplication(self):
+        strings = ["가 나", "다", "가 나", "", "나 다 라"]
+        batch = self.hangul_romanizer.romanize_many(strings)
+        assert batch == [self.hangul_romanizer.romanize(string) for string in strings]
+        assert batch.unique_strings == 4
+        assert batch.unique_words == 4
+
+    def test_words_without_hangul(self):
+        batch = self.hangul_romanizer.romanize_many(["가  나 hello 42", "hello"])
+        assert batch == ["ga  na hello 42", "hello"]
+        assert batch.unique_words == 2
+
+    def test_generator_input(self):
+        batch = self.hangul_romanizer.romanize_many(line for line in ["잘 먹겠습니다"])
+        assert batch == ["jal meok-ge-sseum-ni-da"]
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            self.hangul_romanizer.romanize_many(["가"], engine='rust')
+
+class TestVectorizedEngine:
+
+    @pytest.mark.parametrize('options', [{}, {'show_h': 2, 'always_tense': True}, {'na_neo_ye': True, 'sh': False, 'no_y': True}])
+    def test_matches_romanize(self, options):
+        pytest.importorskip('numpy')
+        hangul_romanizer = HangulRomanizer(**options)
+        strings = ["신라 국물 같이 좋다 꽃잎 맛없다 없어", "의사 의 나의 회의실 회의", "네가 밟다 넓죽 짓밟다",
+                   "'안녕'하세요! K팝 2020년", "  글자 발전  ", "", "hello", "잘 먹겠습니다"]
+        batch = hangul_romanizer.romanize_many(strings, engine='numpy')
+        assert batch == [hangul_romanizer.romanize(string) for string in strings]
+        assert batch.unique_strings == len(strings)
+        assert batch.unique_words == hangul_romanizer.romanize_many(strings).unique_words
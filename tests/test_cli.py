@@ -0,0 +1,61 @@
+import os
+import sys
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import re
+import subprocess
+
+import pytest
+
+from korean_romanization import HangulRomanizer, main
+
+hangul_text = "신라  국물\t같이\r\n　잘 먹겠습니다\n\n동서남북"
+
+class TestCommandLine:
+
+    def test_files(self, tmp_path):
+        hangul_in = tmp_path / "hangul.txt"
+        romanized_out = tmp_path / "romanized.txt"
+        hangul_in.write_bytes(hangul_text.encode('utf8'))
+        assert main([str(hangul_in), "-o", str(romanized_out), "--no-sh", "--oo", "--buffer-size", "7"]) == 0
+        expected = HangulRomanizer(sh=False, oo=True).romanize(hangul_text)
+        assert romanized_out.read_bytes() == expected.encode('utf8')
+        assert romanized_out.read_bytes().startswith(b"sil-la  goong-mool\tga-chi\r\n\xe3\x80\x80jal")
+
+    @pytest.mark.parametrize('flags', [[], ["--jobs", "2", "--chunk-size", "1"], ["--legacy-whitespace"]])
+    def test_stdin_to_stdout(self, flags):
+        result = subprocess.run([sys.executable, "-m", "korean_romanization", *flags], cwd=parent,
+                                input=hangul_text.encode('utf8'), capture_output=True, check=True)
+        options = {'legacy_whitespace': True} if "--legacy-whitespace" in flags else {}
+        expected = ''.join(HangulRomanizer(**options)._romanize_line(line) for line in hangul_text.splitlines(True))
+        assert result.stdout == expected.encode('utf8')
+        assert result.stderr == b""
+
+    def test_stats(self, tmp_path, capsys):
+        hangul_in = tmp_path / "hangul.txt"
+        hangul_in.write_text("가 나\n가 나\n", encoding='utf8')
+        main([str(hangul_in), "-o", str(tmp_path / "romanized.txt"), "--stats"])
+        lines, cache = capsys.readouterr().err.splitlines()
+        assert lines.startswith("2 lines in ") and lines.endswith(" lines/s)")
+        assert cache.startswith("cache: 2 hits, 2 misses")
+
+    def test_stats_with_jobs(self, tmp_path, capsys):
+        hangul_in = tmp_path / "hangul.txt"
+        hangul_in.write_text("가 나\n가 나\n" * 4, encoding='utf8')
+        main([str(hangul_in), "-o", str(tmp_path / "romanized.txt"), "--stats", "--jobs", "2", "--chunk-size", "2"])
+        lines, cache = capsys.readouterr().err.splitlines()
+        assert lines.startswith("8 lines in ")
+        # the lookups of both worker processes are added up, whichever chunks each of them got
+        hits, misses = (int(count) for count in re.match(r"cache: (\d+) hits, (\d+) misses", cache).groups())
+        assert hits + misses == 16 and 2 <= misses <= 4
+        assert cache.endswith(" in 2 worker processes of 4096 words each")
+
+    def test_errors(self, tmp_path):
+        with pytest.raises(SystemExit) as error:
+            main([str(tmp_path / "missing.txt")])
+        assert error.value.code == 1
+        with pytest.raises(SystemExit) as error:
+            main(["--show-h", "3"])
+        assert error.value.code == 2
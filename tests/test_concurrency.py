@@ -0,0 +1,109 @@
+import os
+import sys
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import random
+import threading
+
+import pytest
+
+import korean_romanization
+from korean_romanization import HangulRomanizer, Instrumentation, PersistentCache, RomanizationCache
+
+def random_lines(count, seed=0):
+    rng = random.Random(seed)
+    words = ["신라", "국물", "같이", "좋다", "꽃잎", "맛없다", "없어", "의사", "나의", "네가", "밟다", "'안녕'하세요!", "K팝", "2020년"]
+    words += [''.join(chr(0xac00 + rng.randrange(11172)) for _ in range(rng.randint(1, 4))) for _ in range(200)]
+    return [' '.join(rng.choice(words) for _ in range(rng.randint(0, 12))) for _ in range(count)]
+
+class TestRomanizeConcurrent:
+
+    def test_matches_sequential(self):
+        lines = random_lines(3000)
+        sequential = [HangulRomanizer(cache_size=0).romanize(line) for line in lines]
+        hangul_romanizer = HangulRomanizer(cache=RomanizationCache(64, shards=4))
+        assert hangul_romanizer.romanize_concurrent(lines, workers=8, chunk_size=16) == sequential
+        assert hangul_romanizer.romanize_concurrent(iter(lines), workers=1) == sequential
+        assert hangul_romanizer.romanize_concurrent([]) == []
+
+    def test_instrumentation_totals(self):
+        lines = random_lines(500, seed=1)
+        sequential = Instrumentation()
+        sequential_romanizer = HangulRomanizer(cache_size=0, instrumentation=sequential)
+        for line in lines:
+            sequential_romanizer.romanize(line)
+        concurrent = Instrumentation(timing=True)
+        HangulRomanizer(cache_size=0, instrumentation=concurrent).romanize_concurrent(lines, workers=4, chunk_size=8)
+        expected, snapshot = sequential.snapshot(), concurrent.snapshot()
+        assert (snapshot['words'], snapshot['syllables'], snapshot['rules']) == (expected['words'], expected['syllables'], expected['rules'])
+
+    def test_persistent_cache(self, tmp_path):
+        lines = random_lines(300, seed=2)
+        cache = PersistentCache(tmp_path / "romanizations.sqlite", write_batch=7)
+        first = HangulRomanizer(cache_size=0, persistent_cache=cache)
+        assert first.romanize_concurrent(lines, workers=4, chunk_size=10) == [first.romanize(line) for line in lines]
+        words = {word for line in lines for word in line.split(' ')} - {''}
+        assert len(cache) == len(words)
+
+    def test_persistent_cache_thread_buffers(self, tmp_path):
+        # each thread buffers its own entries, and flush() writes out those of threads that have already finished
+        cache = PersistentCache(tmp_path / "romanizations.sqlite", write_batch=1000)
+        def put(thread):
+            for index in range(50):
+                cache.put('fingerprint', f'{thread}-{index}', 'romanized')
+            assert cache.get('fingerprint', f'{thread}-0') == 'romanized'
+        threads = [threading.Thread(target=put, args=(thread,)) for thread in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert cache.get('fingerprint', '0-0') is None
+        cache.flush()
+        assert cache.get('fingerprint', '0-0') == 'romanized'
+        assert len(cache) == 200
+
+class TestSharedRomanizer:
+
+    def test_stress(self):
+        # many threads hammering one romanizer with a small cache, so entries are constantly evicted
+        lines = random_lines(400, seed=3)
+        expected = [HangulRomanizer(cache_size=0).romanize(line) for line in lines]
+        hangul_romanizer = HangulRomanizer(cache=RomanizationCache(32, shards=4))
+        results = {}
+        barrier = threading.Barrier(8)
+
+        def run(thread):
+            barrier.wait()
+            order = list(range(len(lines)))
+            random.Random(thread).shuffle(order)
+            results[thread] = {index: hangul_romanizer.romanize(lines[index]) for index in order * 3}
+
+        threads = [threading.Thread(target=run, args=(thread,)) for thread in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for romanized in results.values():
+            assert [romanized[index] for index in range(len(lines))] == expected
+        info = hangul_romanizer.cache_info()
+        assert info['size'] <= 32
+        assert info['hits'] + info['misses'] > 0
+
+    def test_without_gil(self, monkeypatch):
+        # free-threaded builds split larger caches into locked shards
+        monkeypatch.setattr(korean_romanization, '_gil_enabled', False)
+        cache = RomanizationCache(4096)
+        assert len(cache._shards) == 16
+        lines = random_lines(300, seed=4)
+        expected = [HangulRomanizer(cache_size=0).romanize(line) for line in lines]
+        assert HangulRomanizer(cache=cache).romanize_concurrent(lines * 4, workers=8, chunk_size=10) == expected * 4
+        info = cache.stats()
+        assert info['hits'] + info['misses'] == sum(len(line.split()) for line in lines * 4)
+
+    def test_immutable(self):
+        hangul_romanizer = HangulRomanizer(cache_size=0)
+        with pytest.raises(ValueError):
+            hangul_romanizer.cache_resize(10)
+        assert hangul_romanizer.cache is None
@@ -0,0 +1,245 @@
+import os
+import sys
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import io
+import pytest
+
+import korean_romanization
+from korean_romanization import HangulRomanizer
+
+hangul_text = "잘 먹겠습니다\n\n동서남북  \n가 나 다"
+romanized_text = "jal meok-ge-sseum-ni-da\n\ndong-seo-nam-buk  \nga na da"
+legacy_romanized_text = "jal meok-ge-sseum-ni-da\n\ndong-seo-nam-buk\nga na da\n"
+
+class TestRomanizeStream:
+    hangul_romanizer = HangulRomanizer()
+
+    def test_lazy(self):
+        stream = self.hangul_romanizer.romanize_stream(iter(["가\n", "나"]))
+        assert next(stream) == "ga"
+        assert list(stream) == ["na"]
+
+class TestRomanizeFile:
+    hangul_romanizer = HangulRomanizer()
+
+    def test_whitespace_preserved(self, tmp_path):
+        hangul_in = tmp_path / "hangul.txt"
+        romanized_out = tmp_path / "romanized.txt"
+        hangul_in.write_text(hangul_text, encoding='utf8')
+        self.hangul_romanizer.romanize_file(hangul_in, romanized_out, buffer_size=5)
+        assert romanized_out.read_text(encoding='utf8') == romanized_text
+
+    def test_huge_line(self, tmp_path):
+        hangul_in = tmp_path / "hangul.txt"
+        romanized_out = tmp_path / "romanized.txt"
+        line = '{"가사": "' + "신라 국물 같이 " * 5000 + '"}'
+        hangul_in.write_text(line, encoding='utf8')
+        self.hangul_romanizer.romanize_file(hangul_in, romanized_out, buffer_size=1024)
+        assert romanized_out.read_text(encoding='utf8') == self.hangul_romanizer.romanize(line)
+
+class TestLegacyRomanizeFile:
+    hangul_romanizer = HangulRomanizer(legacy_whitespace=True)
+
+    def test_paths(self, tmp_path):
+        hangul_in = tmp_path / "hangul.txt"
+        romanized_out = tmp_path / "romanized.txt"
+        hangul_in.write_text(hangul_text, encoding='utf8')
+        self.hangul_romanizer.romanize_file(hangul_in, romanized_out, batch_size=1)
+        assert romanized_out.read_text(encoding='utf8') == legacy_romanized_text
+
+    def test_file_objects(self):
+        writer = io.StringIO()
+        self.hangul_romanizer.romanize_file(io.StringIO(hangul_text), writer)
+        assert writer.getvalue() == legacy_romanized_text
+
+    def test_parallel_is_identical(self, tmp_path):
+        hangul_in = tmp_path / "hangul.txt"
+        hangul_in.write_text(hangul_text * 50, encoding='utf8')
+        for legacy_whitespace in (False, True):
+            hangul_romanizer = HangulRomanizer(sh=False, oo=True, legacy_whitespace=legacy_whitespace)
+            hangul_romanizer.romanize_file(hangul_in, tmp_path / "serial.txt")
+            hangul_romanizer.romanize_file(hangul_in, tmp_path / "parallel.txt", workers=2, chunk_size=7)
+            assert (tmp_path / "parallel.txt").read_bytes() == (tmp_path / "serial.txt").read_bytes()
+
+class TestResumableRomanizeFile:
+
+    def test_resume_after_interruption(self, tmp_path, monkeypatch):
+        hangul_in = tmp_path / "hangul.txt"
+        hangul_in.write_text(hangul_text * 20, encoding='utf8')
+        hangul_romanizer = HangulRomanizer()
+        hangul_romanizer.romanize_file(hangul_in, tmp_path / "expected.txt")
+
+        # fail partway through the first run
+        romanize_lines = HangulRomanizer._romanize_lines
+        calls = []
+        def interrupted(self, lines):
+            calls.append(None)
+            if len(calls) > 3:
+                raise KeyboardInterrupt
+            return romanize_lines(self, lines)
+        monkeypatch.setattr(HangulRomanizer, '_romanize_lines', interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            hangul_romanizer.romanize_file(hangul_in, tmp_path / "resumed.txt", resume=True, checkpoint_bytes=64)
+        assert (tmp_path / "resumed.txt.ckpt").exists()
+        assert (tmp_path / "hangul.txt.idx").exists()
+
+        monkeypatch.setattr(HangulRomanizer, '_romanize_lines', romanize_lines)
+        hangul_romanizer.romanize_file(hangul_in, tmp_path / "resumed.txt", resume=True, checkpoint_bytes=64)
+        assert (tmp_path / "resumed.txt").read_bytes() == (tmp_path / "expected.txt").read_bytes()
+        assert not (tmp_path / "resumed.txt.ckpt").exists()
+
+    def test_resume_with_different_checkpoint_bytes(self, tmp_path, monkeypatch):
+        hangul_in = tmp_path / "hangul.txt"
+        hangul_in.write_text(''.join(f"{index}번 신라 국물\n" for index in range(200)), encoding='utf8')
+        hangul_romanizer = HangulRomanizer()
+        hangul_romanizer.romanize_file(hangul_in, tmp_path / "expected.txt")
+
+        romanize_lines = HangulRomanizer._romanize_lines
+        calls = []
+        def interrupted(self, lines):
+            calls.append(None)
+            if len(calls) > 5:
+                raise KeyboardInterrupt
+            return romanize_lines(self, lines)
+        monkeypatch.setattr(HangulRomanizer, '_romanize_lines', interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            hangul_romanizer.romanize_file(hangul_in, tmp_path / "resumed.txt", resume=True, checkpoint_bytes=64)
+
+        # the checkpoint falls inside one of the new, larger ranges
+        monkeypatch.setattr(HangulRomanizer, '_romanize_lines', romanize_lines)
+        hangul_romanizer.romanize_file(hangul_in, tmp_path / "resumed.txt", resume=True, checkpoint_bytes=1000)
+        assert (tmp_path / "resumed.txt").read_bytes() == (tmp_path / "expected.txt").read_bytes()
+
+    def test_rule_set_change_starts_over(self, tmp_path, monkeypatch):
+        hangul_in = tmp_path / "hangul.txt"
+        hangul_in.write_text(hangul_text * 20, encoding='utf8')
+        romanize_lines = HangulRomanizer._romanize_lines
+        calls = []
+        def counted(self, lines):
+            calls.append(None)
+            if len(calls) == 4 and interrupt:
+                raise KeyboardInterrupt
+            return romanize_lines(self, lines)
+        monkeypatch.setattr(HangulRomanizer, '_romanize_lines', counted)
+
+        interrupt = False
+        HangulRomanizer().romanize_file(hangul_in, tmp_path / "expected.txt", resume=True, checkpoint_bytes=64)
+        range_count = len(calls)
+        interrupt = True
+        calls.clear()
+        with pytest.raises(KeyboardInterrupt):
+            HangulRomanizer().romanize_file(hangul_in, tmp_path / "resumed.txt", resume=True, checkpoint_bytes=64)
+
+        # a newer rule set doesn't pick up the old checkpoint
+        monkeypatch.setattr(korean_romanization, '_ruleset_digest', 'upgraded')
+        interrupt = False
+        calls.clear()
+        HangulRomanizer().romanize_file(hangul_in, tmp_path / "resumed.txt", resume=True, checkpoint_bytes=64)
+        assert len(calls) == range_count
+        assert (tmp_path / "resumed.txt").read_bytes() == (tmp_path / "expected.txt").read_bytes()
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_custom_exceptions(self, tmp_path, workers):
+        hangul_in = tmp_path / "hangul.txt"
+        hangul_in.write_text("눈약 문법 꽃잎\n" * 40, encoding='utf8')
+        exceptions = tmp_path / "exceptions.tsv"
+        exceptions.write_text("눈|약\tlinking\n문|법\ttensing\n", encoding='utf8')
+        hangul_romanizer = HangulRomanizer(exceptions=exceptions)
+        hangul_romanizer.romanize_file(hangul_in, tmp_path / "resumed.txt", workers=workers, resume=True, checkpoint_bytes=64)
+        assert (tmp_path / "resumed.txt").read_text(encoding='utf8') == "nun-nyak mun-ppeop kkon-nip\n" * 40
+        assert not (tmp_path / "resumed.txt.ckpt").exists()
+        assert not (tmp_path / "resumed.txt.ckpt.tmp").exists()
+
+    def test_parallel_ranges(self, tmp_path):
+        hangul_in = tmp_path / "hangul.txt"
+        hangul_in.write_text(hangul_text * 20, encoding='utf8')
+        hangul_romanizer = HangulRomanizer()
+        hangul_romanizer.romanize_file(hangul_in, tmp_path / "expected.txt")
+        hangul_romanizer.romanize_file(hangul_in, tmp_path / "parallel.txt", workers=2, resume=True, checkpoint_bytes=100)
+        assert (tmp_path / "parallel.txt").read_bytes() == (tmp_path / "expected.txt").read_bytes()
+
+class TestIncrementalRomanizeFile:
+
+    def test_only_changed_lines_are_romanized(self, tmp_path):
+        romanized_lines = []
+        hangul_romanizer = HangulRomanizer()
+        romanize = hangul_romanizer.romanize
+        hangul_romanizer.romanize = lambda line: romanized_lines.append(line) or romanize(line)
+
+        hangul_in = tmp_path / "hangul.txt"
+        romanized_out = tmp_path / "romanized.txt"
+        expected_out = tmp_path / "expected.txt"
+        lines = [f"{index}번 신라 국물 같이\n" for index in range(50)]
+
+        def check(romanized_count):
+            romanized_lines.clear()
+            hangul_in.write_text(''.join(lines), encoding='utf8')
+            hangul_romanizer.romanize_file(hangul_in, romanized_out, incremental=True)
+            HangulRomanizer().romanize_file(hangul_in, expected_out)
+            assert romanized_out.read_bytes() == expected_out.read_bytes()
+            assert len(romanized_lines) == romanized_count
+
+        check(50)
+        check(0)
+        lines.append("잘 먹겠습니다\n")
+        check(1)
+        lines[10] = "꽃잎\n"
+        lines.insert(20, lines.pop(30)) # moved lines are reused
+        check(1)
+        del lines[40:]
+        check(0)
+        lines.clear()
+        check(0)
+
+    def test_interrupted_rewrite_keeps_old_output(self, tmp_path):
+        hangul_in = tmp_path / "hangul.txt"
+        romanized_out = tmp_path / "romanized.txt"
+        lines = [f"{index}번 신라 국물 같이\n" for index in range(50)]
+        hangul_in.write_text(''.join(lines), encoding='utf8')
+        HangulRomanizer().romanize_file(hangul_in, romanized_out, incremental=True)
+        old_output = romanized_out.read_bytes()
+
+        # an edit near the start, then a failure partway through the rest of the file
+        lines[5] = "꽃잎\n"
+        lines[30] = "잘 먹겠습니다\n"
+        hangul_in.write_text(''.join(lines), encoding='utf8')
+        hangul_romanizer = HangulRomanizer()
+        romanize_line = hangul_romanizer._romanize_line
+        def interrupted(line):
+            if line == lines[30]:
+                raise KeyboardInterrupt
+            return romanize_line(line)
+        hangul_romanizer._romanize_line = interrupted
+        with pytest.raises(KeyboardInterrupt):
+            hangul_romanizer.romanize_file(hangul_in, romanized_out, incremental=True)
+        assert romanized_out.read_bytes() == old_output
+
+        HangulRomanizer().romanize_file(hangul_in, romanized_out, incremental=True)
+        HangulRomanizer().romanize_file(hangul_in, tmp_path / "expected.txt")
+        assert romanized_out.read_bytes() == (tmp_path / "expected.txt").read_bytes()
+
+    def test_configuration_change(self, tmp_path):
+        hangul_in = tmp_path / "hangul.txt"
+        hangul_in.write_text("시\n", encoding='utf8')
+        HangulRomanizer().romanize_file(hangul_in, tmp_path / "romanized.txt", incremental=True)
+        HangulRomanizer(sh=False).romanize_file(hangul_in, tmp_path / "romanized.txt", incremental=True)
+        assert (tmp_path / "romanized.txt").read_text(encoding='utf8') == "si\n"
+
+        # an output that was modified since is written again
+        (tmp_path / "romanized.txt").write_text("garbage\n", encoding='utf8')
+        HangulRomanizer(sh=False).romanize_file(hangul_in, tmp_path / "romanized.txt", incremental=True)
+        assert (tmp_path / "romanized.txt").read_text(encoding='utf8') == "si\n"
+
+    def test_whitespace_mode_change(self, tmp_path):
+        hangul_in = tmp_path / "hangul.txt"
+        romanized_out = tmp_path / "romanized.txt"
+        hangul_in.write_text("  안녕 하세요  \n", encoding='utf8')
+        HangulRomanizer().romanize_file(hangul_in, romanized_out, incremental=True)
+        assert romanized_out.read_text(encoding='utf8') == "  an-nyeong ha-se-yo  \n"
+        HangulRomanizer(legacy_whitespace=True).romanize_file(hangul_in, romanized_out, incremental=True)
+        assert romanized_out.read_text(encoding='utf8') == "an-nyeong ha-se-yo\n"
+        HangulRomanizer().romanize_file(hangul_in, romanized_out, incremental=True)
+        assert romanized_out.read_text(encoding='utf8') == "  an-nyeong ha-se-yo  \n"
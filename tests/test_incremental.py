@@ -0,0 +1,65 @@
+import os
+import sys
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import random
+
+import pytest
+
+from korean_romanization import HangulRomanizer, IncrementalDocument
+
+class TestIncrementalDocument:
+
+    @pytest.mark.parametrize('legacy_whitespace', [False, True])
+    def test_random_edits_match_romanize(self, legacy_whitespace):
+        hangul_romanizer = HangulRomanizer(legacy_whitespace=legacy_whitespace)
+        rng = random.Random(0)
+        alphabet = ['가', '나', '신', '라', '국', '물', '의', '네', '꽃', '잎', '맛', '없', ' ', ' ', ' ', '\t', '\n', '\u3000', 'a', '!']
+        for _ in range(100):
+            document = IncrementalDocument(hangul_romanizer, ''.join(rng.choice(alphabet) for _ in range(rng.randrange(30))))
+            assert document.romanized == hangul_romanizer.romanize(document.text)
+            for _ in range(20):
+                start = rng.randrange(len(document.text) + 1)
+                end = rng.randrange(start, len(document.text) + 1)
+                replacement = ''.join(rng.choice(alphabet) for _ in range(rng.randrange(4)))
+                romanized, spans = document.edit(start, end, replacement)
+                assert romanized == hangul_romanizer.romanize(document.text)
+                for source_start, source_end, romanized_start, romanized_end in spans:
+                    assert romanized[romanized_start:romanized_end] == hangul_romanizer._romanize_word(document.text[source_start:source_end])
+
+    def test_only_edited_words_are_romanized(self):
+        romanized_words = []
+        hangul_romanizer = HangulRomanizer(cache_size=0)
+        romanize_word = hangul_romanizer._romanize_word
+        hangul_romanizer._romanize_word = lambda word: romanized_words.append(word) or romanize_word(word)
+
+        document = IncrementalDocument(hangul_romanizer, "신라 국물 같이 좋다")
+        romanized_words.clear()
+        romanized, spans = document.edit(3, 5, "국밥")
+        assert romanized == "shil-la guk-bap ga-chi jo-ta"
+        assert romanized_words == ["국밥"]
+
+        # joining two words re-romanizes both of them as one
+        romanized_words.clear()
+        assert document.edit(5, 6, "")[0] == "shil-la guk-bap-ga-chi jo-ta"
+        assert romanized_words == ["국밥같이"]
+
+    def test_offset_map(self):
+        document = IncrementalDocument(HangulRomanizer(), " 신라\t국물 ")
+        assert document.spans == [(1, 3, 1, 8), (4, 6, 9, 17)]
+        assert (document.to_romanized(1), document.to_romanized(3), document.to_romanized(4)) == (1, 8, 9)
+        assert (document.to_source(9), document.to_source(17), document.to_source(18)) == (4, 6, 7)
+        assert document.to_romanized(0) == 0 and document.to_romanized(7) == 18
+
+        document = IncrementalDocument(HangulRomanizer(legacy_whitespace=True), " 신라 국물 ")
+        assert document.spans == [(1, 3, 0, 7), (4, 6, 8, 16)]
+        assert (document.to_romanized(1), document.to_romanized(3), document.to_romanized(4)) == (0, 7, 8)
+        assert (document.to_source(8), document.to_source(16)) == (4, 6)
+        assert document.to_romanized(0) == 0 and document.to_romanized(7) == 16
+
+    def test_invalid_range(self):
+        document = IncrementalDocument(HangulRomanizer(), "신라")
+        with pytest.raises(ValueError):
+            document.edit(1, 3, "")
@@ -28,3 +28,19 @@ class TestFinals:
     def test_three(self):
         output = self.hangul_romanizer.romanize("악 안 앋")
         assert output == "ak an at"
+
+class TestSyllableTable:
+    hangul_romanizer = HangulRomanizer()
+
+    def test_decomposition(self):
+        table = HangulRomanizer._syllable_table or HangulRomanizer._build_syllable_table()
+        assert len(table) == HangulRomanizer.block_count
+        assert HangulRomanizer._decode(table[ord('값') - HangulRomanizer.hangul_blocks]) == ['g', 'a', 'bs', '-']
+
+    def test_phoneme_codes_fit_in_bytes(self):
+        assert len(HangulRomanizer.phonemes) <= 256
+        assert len(set(HangulRomanizer.phonemes)) == len(HangulRomanizer.phonemes)
+
+    def test_positional_ui(self):
+        output = self.hangul_romanizer.romanize("의사 의 나의 회의실 회의")
+        assert output == "eui-sa eui na-e hwe-i-shil hwe-e"
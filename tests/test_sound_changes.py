@@ -0,0 +1,119 @@
+import os
+import sys
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import pytest
+
+from korean_romanization import ExceptionLexicon, HangulRomanizer, Instrumentation
+
+class TestBoundaryTable:
+
+    @pytest.mark.parametrize('show_h', [0, 1, 2])
+    @pytest.mark.parametrize('show_hada_h', [False, True])
+    def test_matches_reference(self, show_h, show_hada_h):
+        hangul_romanizer = HangulRomanizer(show_h=show_h, show_hada_h=show_hada_h)
+        phonemes = HangulRomanizer.phonemes
+        count = HangulRomanizer.phoneme_count
+        for key, resolved in hangul_romanizer._boundary_table.items():
+            final, next_initial, next_vowel = phonemes[key // count // count], phonemes[key // count % count], phonemes[key % count]
+            assert HangulRomanizer._decode(resolved) == list(hangul_romanizer._resolve_boundary(final, next_initial, next_vowel))
+
+    @pytest.mark.parametrize('options', [{}, {'always_tense': True}, {'voiced_double': True, 'sh': False, 'oo': True, 'ee': True, 'no_y': True}])
+    def test_second_pass_matches_reference(self, options):
+        hangul_romanizer = HangulRomanizer(**options)
+        phonemes = HangulRomanizer.phonemes
+        count = HangulRomanizer.phoneme_count
+        for index, resolved in enumerate(hangul_romanizer._final_table):
+            if resolved is not None:
+                final, next_initial = phonemes[index // count], phonemes[index % count]
+                assert HangulRomanizer._decode(resolved) == list(hangul_romanizer._resolve_final(final, '', '', next_initial, ''))
+        for index, styled in enumerate(hangul_romanizer._style_table):
+            if styled is not None:
+                initial, vowel = phonemes[index // count], phonemes[index % count]
+                assert HangulRomanizer._decode(styled) == list(hangul_romanizer._style_syllable(initial, vowel))
+
+    def test_sound_changes(self):
+        hangul_romanizer = HangulRomanizer()
+        output = hangul_romanizer.romanize("신라 국물 같이 좋다 꽃잎 맛없다 없어")
+        assert output == "shil-la gung-mul ga-chi jo-ta kkon-nip ma-deop-da eop-seo"
+
+class TestMixedText:
+    hangul_romanizer = HangulRomanizer()
+
+    def test_non_hangul_unchanged(self):
+        line = "  see https://example.com/a-b?c=1 & 42 :) \n"
+        assert self.hangul_romanizer.romanize(line) == line
+        assert HangulRomanizer(legacy_whitespace=True).romanize(line) == line.strip()
+
+    def test_unicode_whitespace(self):
+        line = " 신라\t국물\u3000같이  좋다\n"
+        assert self.hangul_romanizer.romanize(line) == " shil-la\tgung-mul\u3000ga-chi  jo-ta\n"
+        assert HangulRomanizer(legacy_whitespace=True).romanize(line) == "shil-la-\t-gung-mul-\u3000-ga-chi  jo-ta"
+
+    def test_chunks(self):
+        line = "신라 국물\t같이 " * 1000
+        chunks = list(self.hangul_romanizer.romanize_chunks(line, chunk_size=100))
+        assert ''.join(chunks) == self.hangul_romanizer.romanize(line)
+        assert max(map(len, chunks)) < 300
+
+    def test_chunks_long_word(self):
+        line = '{"data": "' + "QUJD/+" * 20000 + '"} 신라"국물"' + "가" * 500
+        chunks = list(self.hangul_romanizer.romanize_chunks(line, chunk_size=100))
+        assert ''.join(chunks) == self.hangul_romanizer.romanize(line)
+        assert max(map(len, chunks[:-1])) < 300
+
+    def test_run_boundaries(self):
+        output = self.hangul_romanizer.romanize("'안녕'하세요! K팝 2020년 \"나의\"")
+        assert output == "'an-nyeong'-ha-se-yo! K-pap 2020-nyeon \"na-i\""
+
+class TestExceptionLexicon:
+
+    def test_find(self):
+        exceptions = ExceptionLexicon.default()
+        assert exceptions.find("꽃잎") == {0: ExceptionLexicon.linking}
+        assert exceptions.find("맛없다") == {0: ExceptionLexicon.merging}
+        assert exceptions.find("잎") == {}
+        assert exceptions.find("솜이불") == {0: ExceptionLexicon.linking}
+        assert exceptions.find("사람") == {}
+
+    def test_loaded_entries(self, tmp_path):
+        path = tmp_path / "exceptions.tsv"
+        path.write_text("# domain entries\n눈|약\tlinking\n\n문|법\ttensing\n", encoding='utf8')
+        default = HangulRomanizer()
+        custom = HangulRomanizer(exceptions=path, cache=default.cache)
+        assert len(custom.exceptions) == len(ExceptionLexicon.default_entries) + 2
+        assert custom.fingerprint != default.fingerprint
+        assert default.romanize("눈약 문법 꽃잎") == "nu-nyak mun-beop kkon-nip"
+        assert custom.romanize("눈약 문법 꽃잎") == "nun-nyak mun-ppeop kkon-nip"
+
+    def test_invalid_entries(self, tmp_path):
+        with pytest.raises(ValueError):
+            ExceptionLexicon([('눈약', 'linking')])
+        with pytest.raises(ValueError):
+            ExceptionLexicon([('눈|약', 'assimilation')])
+        path = tmp_path / "exceptions.tsv"
+        path.write_text("눈|약 linking\n", encoding='utf8')
+        with pytest.raises(ValueError):
+            ExceptionLexicon.load(path)
+
+class TestInstrumentation:
+
+    def test_rule_counts(self):
+        instrumentation = Instrumentation()
+        hangul_romanizer = HangulRomanizer(instrumentation=instrumentation)
+        assert hangul_romanizer.romanize("국물 같이 닭고기 맛없다") == "gung-mul ga-chi dal-kko-gi ma-deop-da"
+        snapshot = instrumentation.snapshot()
+        assert snapshot['words'] == 4
+        assert snapshot['phase_seconds'] == {}
+        rules = snapshot['rules']
+        assert (rules['nasalization'], rules['palatalization'], rules['compound_merging']) == (1, 1, 1)
+        assert (rules['cluster_rg_before_g'], rules['tensing']) == (1, 1)
+
+    def test_timing(self):
+        instrumentation = Instrumentation(timing=True)
+        HangulRomanizer(instrumentation=instrumentation).romanize("잘 먹겠습니다")
+        assert set(instrumentation.snapshot()['phase_seconds']) == set(Instrumentation.phases)
+        instrumentation.reset()
+        assert instrumentation.snapshot()['words'] == 0
@@ -0,0 +1,123 @@
+import os
+import sys
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import pytest
+
+import korean_romanization
+from korean_romanization import HangulRomanizer, LexiconSnapshot, PersistentCache, RomanizationCache
+
+class TestWordCache:
+
+    def test_hits_and_misses(self):
+        hangul_romanizer = HangulRomanizer(cache_size=16)
+        output = hangul_romanizer.romanize("가 가 나 가")
+        assert output == "ga ga na ga"
+        info = hangul_romanizer.cache_info()
+        assert (info['hits'], info['misses'], info['size']) == (2, 2, 2)
+
+    def test_words_without_hangul_are_not_cached(self):
+        hangul_romanizer = HangulRomanizer(cache_size=16)
+        assert hangul_romanizer.romanize("가  나 hello 42 漢字") == "ga  na hello 42 漢字"
+        info = hangul_romanizer.cache_info()
+        assert (info['hits'], info['misses'], info['size']) == (0, 2, 2)
+
+    def test_eviction_and_resize(self):
+        hangul_romanizer = HangulRomanizer(cache_size=2)
+        hangul_romanizer.romanize("가 나 다")
+        assert hangul_romanizer.cache_info()['evictions'] == 1
+        hangul_romanizer.cache_resize(1)
+        assert hangul_romanizer.cache_info()['size'] == 1
+        hangul_romanizer.cache_clear()
+        assert hangul_romanizer.cache_info()['size'] == 0
+
+    def test_default_cache_is_exact_lru(self):
+        hangul_romanizer = HangulRomanizer()
+        words = [chr(0xac00 + index) for index in range(4097)]
+        hangul_romanizer.romanize(' '.join(words[:4096]))
+        hangul_romanizer.romanize(words[0]) # most recently used again
+        hangul_romanizer.romanize(words[4096])
+        assert hangul_romanizer.cache_info()['evictions'] == 1
+        hangul_romanizer.romanize(words[0])
+        assert hangul_romanizer.cache_info()['misses'] == 4097
+
+    def test_shared_cache_is_config_aware(self):
+        cache = RomanizationCache(16)
+        default = HangulRomanizer(cache=cache)
+        no_sh = HangulRomanizer(sh=False, cache=cache)
+        assert default.romanize("시") == "shi"
+        assert no_sh.romanize("시") == "si"
+        assert default.romanize("시") == "shi"
+
+class TestPersistentCache:
+
+    def test_shared_across_instances(self, tmp_path):
+        path = tmp_path / "romanizations.sqlite"
+        first = HangulRomanizer(persistent_cache=path)
+        assert first.romanize("잘 먹겠습니다") == "jal meok-ge-sseum-ni-da"
+        first.flush()
+
+        # a new romanizer starts with an empty in-memory cache but finds the stored words
+        second = HangulRomanizer(persistent_cache=PersistentCache(path))
+        assert second.fingerprint == first.fingerprint
+        assert second.persistent_cache.get(second.fingerprint, "먹겠습니다") == "meok-ge-sseum-ni-da"
+        assert second.romanize("잘 먹겠습니다") == "jal meok-ge-sseum-ni-da"
+
+    def test_keyed_by_configuration(self, tmp_path):
+        cache = PersistentCache(tmp_path / "romanizations.sqlite")
+        default = HangulRomanizer(persistent_cache=cache)
+        no_sh = HangulRomanizer(sh=False, persistent_cache=cache)
+        assert default.fingerprint != no_sh.fingerprint
+        assert default.romanize("시") == "shi"
+        assert no_sh.romanize("시") == "si"
+        assert len(cache) == 2
+
+    def test_words_without_hangul_are_not_stored(self, tmp_path):
+        cache = PersistentCache(tmp_path / "romanizations.sqlite")
+        hangul_romanizer = HangulRomanizer(persistent_cache=cache)
+        hangul_romanizer.romanize("'안녕'하세요!  K팝 2020년 https://example.com 42 ok")
+        hangul_romanizer.flush()
+        assert len(cache) == 3
+
+    def test_fingerprint_follows_rule_set_version(self, monkeypatch):
+        fingerprint = HangulRomanizer().fingerprint
+        monkeypatch.setattr(korean_romanization, '_ruleset_digest', None)
+        monkeypatch.setattr(korean_romanization, 'RULESET_VERSION', korean_romanization.RULESET_VERSION + 1)
+        assert HangulRomanizer().fingerprint != fingerprint
+
+    def test_parallel_workers(self, tmp_path):
+        hangul_in = tmp_path / "hangul.txt"
+        hangul_in.write_text("가 나 다\n라 마 바\n" * 10, encoding='utf8')
+        cache = PersistentCache(tmp_path / "romanizations.sqlite")
+        hangul_romanizer = HangulRomanizer(persistent_cache=cache)
+        hangul_romanizer.romanize_file(hangul_in, tmp_path / "romanized.txt", workers=2, chunk_size=3)
+        assert len(cache) == 6
+
+class TestLexiconSnapshot:
+
+    def test_lookup(self, tmp_path):
+        words = ["잘", "먹겠습니다", "신라", "의사", "잘"]
+        snapshot = HangulRomanizer().build_snapshot(tmp_path / "lexicon.bin", words)
+        assert len(snapshot) == 4
+        assert snapshot.get("먹겠습니다") == "meok-ge-sseum-ni-da"
+        assert snapshot.get("없어") is None
+
+        # reopened from the path, without computing anything
+        hangul_romanizer = HangulRomanizer(cache_size=0, snapshot=tmp_path / "lexicon.bin")
+        hangul_romanizer._romanize_word = None
+        assert hangul_romanizer.romanize("신라 의사") == "shil-la eui-sa"
+
+    def test_falls_back_to_sound_changes(self, tmp_path):
+        snapshot = HangulRomanizer().build_snapshot(tmp_path / "lexicon.bin", ["신라"])
+        hangul_romanizer = HangulRomanizer(snapshot=snapshot)
+        assert hangul_romanizer.romanize("신라 국물 같이") == HangulRomanizer().romanize("신라 국물 같이")
+
+    def test_rejects_other_configuration(self, tmp_path):
+        HangulRomanizer().build_snapshot(tmp_path / "lexicon.bin", ["시"])
+        with pytest.raises(ValueError):
+            HangulRomanizer(sh=False, snapshot=tmp_path / "lexicon.bin")
+        (tmp_path / "other.bin").write_bytes(b"not a snapshot")
+        with pytest.raises(ValueError):
+            LexiconSnapshot(tmp_path / "other.bin")